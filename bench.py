@@ -0,0 +1,193 @@
+"""Micro-benchmarks for NeuroDash hot paths.
+
+Usage:
+    uv run bench.py            # run every benchmark
+    uv run bench.py json       # run one benchmark by name
+"""
+import os
+import random
+import sys
+import time
+import timeit
+import types
+
+os.environ.setdefault("HISTORY_FILE", "") # Never touch the real history file from a benchmark
+
+import main  # noqa: E402
+
+
+def make_payload(cores, gpus=1, procs=5):
+    # Same shape as a published StatsSampler snapshot on a busy host
+    rnd = random.Random(cores)
+
+    def history():
+        return [round(rnd.uniform(0, 100), 1) for _ in range(main.HISTORY_SIZE)]
+
+    return {
+        "os": "Linux 6.8.0-51-generic",
+        "cpu": {
+            "model": "AMD EPYC 9754 128-Core Processor",
+            "global_usage": 42.3,
+            "history": history(),
+            "cores": [round(rnd.uniform(0, 100), 1) for _ in range(cores)],
+            "count_physical": cores // 2,
+            "count_logical": cores
+        },
+        "memory": {
+            "ram_percent": 61.2, "ram_used_gb": 385.1, "ram_total_gb": 629.0,
+            "ram_history": history(),
+            "swap_percent": 0.4, "swap_used_gb": 0.1, "swap_total_gb": 8.0
+        },
+        "storage": {"root_percent": 71.3, "root_used_gb": 1302.0, "root_total_gb": 1833.0},
+        "processes": [
+            {"pid": 1000 + i, "name": f"python{i}", "username": "trainer",
+             "memory_percent": rnd.uniform(0, 10), "cpu_percent": rnd.uniform(0, 800)}
+            for i in range(procs)
+        ],
+        "gpus": [
+            {"index": i, "available": True, "name": "NVIDIA H100 80GB HBM3", "driver": "550.54.15",
+             "utilization": 97, "history": history(), "vram_percent": 88.4, "vram_used_gb": 70.7,
+             "vram_total_gb": 80.0, "temp_c": 71, "fan_percent": 0, "power_w": 652.0,
+             "power_limit_w": 700.0, "pcie_tx_mb": 1203.0, "pcie_rx_mb": 8740.0}
+            for i in range(gpus)
+        ]
+    }
+
+
+def _time_per_call(fn):
+    # Best of 5 runs, each long enough (>= 0.2s) to hide timer resolution
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def bench_json():
+    # Encode time of one snapshot per encoder backend, for 8 to 256 logical cores
+    encoders = [main.pick_json_encoder(name) for name in ("json", "msgspec", "orjson")
+                if name == "json" or getattr(main, name) is not None]
+    print(f"{'cores':>6} {'bytes':>7} " + " ".join(f"{name + ' (us)':>14}" for name, _ in encoders))
+    for cores in (8, 32, 64, 128, 256):
+        payload = make_payload(cores)
+        size = len(main._stdlib_json_encode(payload))
+        timings = [_time_per_call(lambda enc=enc: enc(payload)) * 1e6 for _, enc in encoders]
+        print(f"{cores:>6} {size:>7} " + " ".join(f"{t:>14.1f}" for t in timings))
+
+
+def make_fake_nvml(call_latency_s, pcie_latency_s=0.02, gpus=1, pcie_counters=True):
+    # Stand-in for pynvml: every call sleeps `call_latency_s` (a driver round-trip),
+    # nvmlDeviceGetPcieThroughput sleeps `pcie_latency_s` like the real 20ms sampling window
+    nvml = types.ModuleType("fake_pynvml")
+    nvml.NVML_TEMPERATURE_GPU = 0
+    nvml.NVML_PCIE_UTIL_TX_BYTES, nvml.NVML_PCIE_UTIL_RX_BYTES = 0, 1
+    nvml.NVML_FI_DEV_POWER_INSTANT = 186
+    nvml.NVML_FI_DEV_PCIE_COUNT_TX_BYTES, nvml.NVML_FI_DEV_PCIE_COUNT_RX_BYTES = 197, 198
+    nvml.NVML_CLOCK_SM, nvml.NVML_CLOCK_MEM = 1, 2
+    nvml.clock_reasons = 0x4 # SW power cap, as on a card at its limit; test_main.py changes it between ticks
+    field_values = {186: 652000}
+    counter = [0]
+
+    def call(result):
+        def fn(*args):
+            time.sleep(call_latency_s)
+            return result
+        return fn
+
+    def pcie_throughput(handle, counter_type):
+        time.sleep(pcie_latency_s)
+        return 8 * 1024**2
+
+    def clock_reasons(handle):
+        time.sleep(call_latency_s)
+        return nvml.clock_reasons
+
+    def field_values_call(handle, field_ids):
+        time.sleep(call_latency_s)
+        counter[0] += 8 * 1024**3
+        values = []
+        for field_id in field_ids:
+            if field_id in (197, 198):
+                ok, value = pcie_counters, counter[0]
+            else:
+                ok, value = True, field_values[field_id]
+            values.append(types.SimpleNamespace(nvmlReturn=0 if ok else 3, valueType=3, # 3 = NOT_SUPPORTED
+                                                value=types.SimpleNamespace(ullVal=value)))
+        return values
+
+    nvml.nvmlInit = call(None)
+    nvml.nvmlSystemGetDriverVersion = call("550.54.15")
+    nvml.nvmlDeviceGetCount = call(gpus)
+    nvml.nvmlDeviceGetHandleByIndex = lambda index: index
+    nvml.nvmlDeviceGetName = call("NVIDIA H100 80GB HBM3")
+    nvml.nvmlDeviceGetUtilizationRates = call(types.SimpleNamespace(gpu=97, memory=40))
+    nvml.nvmlDeviceGetMemoryInfo = call(types.SimpleNamespace(used=70 * 1024**3, total=80 * 1024**3))
+    nvml.nvmlDeviceGetTemperature = call(71)
+    nvml.nvmlDeviceGetFanSpeed = call(0)
+    nvml.nvmlDeviceGetPowerUsage = call(652000)
+    nvml.nvmlDeviceGetEnforcedPowerLimit = call(700000)
+    nvml.nvmlDeviceGetClockInfo = call(1980)
+    nvml.nvmlDeviceGetMaxClockInfo = call(1980)
+    nvml.nvmlDeviceGetPerformanceState = call(0)
+    nvml.nvmlDeviceGetCurrentClocksEventReasons = clock_reasons
+    nvml.nvmlDeviceGetPcieThroughput = pcie_throughput
+    nvml.nvmlDeviceGetFieldValues = field_values_call
+    return nvml
+
+
+def bench_nvml():
+    # GPU collector cost per tick against a fake NVML with 0.05-1ms per call:
+    #   per-call  - one call per metric, blocking PCIe reads inline (GPU_PCIE_INTERVAL=0)
+    #   lane      - batched field values, PCIe throughput from the slow lane thread
+    #   counters  - batched field values including the cumulative PCIe byte counters
+    print(f"{'gpus':>5} {'call (ms)':>10} {'per-call (ms)':>14} {'lane (ms)':>10} {'counters (ms)':>14}")
+    real_nvml, real_has_lib = main.pynvml if main.HAS_NVIDIA_LIB else None, main.HAS_NVIDIA_LIB
+    try:
+        for gpus in (1, 8):
+            for latency in (0.00005, 0.0002, 0.001):
+                timings = []
+                for mode in ("per-call", "lane", "counters"):
+                    main.pynvml = make_fake_nvml(latency, gpus=gpus, pcie_counters=mode == "counters")
+                    main.HAS_NVIDIA_LIB = True
+                    collector = main.AdvancedSystemMonitor().collectors["gpus"]
+                    if mode == "per-call":
+                        collector.field_ids, collector.pcie_lane = [], None
+                    collector.collect(time.time()) # Prime counters and start the lane
+                    timings.append(_time_per_call(lambda: collector.collect(time.time())) * 1e3)
+                print(f"{gpus:>5} {latency * 1e3:>10.2f} " + " ".join(f"{t:>{w}.2f}" for t, w in zip(timings, (14, 10, 14))))
+    finally:
+        main.pynvml, main.HAS_NVIDIA_LIB = real_nvml, real_has_lib
+
+
+def bench_procfs():
+    # Linux CPU/memory collection: psutil vs kept-open /proc descriptors (PROCFS_FAST_PATH)
+    stat, meminfo = main.open_proc_file("/proc/stat"), main.open_proc_file("/proc/meminfo")
+    if not stat or not meminfo:
+        print("procfs fast path unavailable on this platform")
+        return
+    last_times = [main.parse_proc_stat(stat.read())]
+
+    def procfs_cpu():
+        times = main.parse_proc_stat(stat.read())
+        main.cpu_percents(last_times[0], times)
+        last_times[0] = times
+
+    cases = (
+        ("cpu", lambda: (main.psutil.cpu_percent(interval=None), main.psutil.cpu_percent(interval=None, percpu=True)), procfs_cpu),
+        ("memory+swap", lambda: (main.psutil.virtual_memory(), main.psutil.swap_memory()), lambda: main.parse_meminfo(meminfo.read())),
+    )
+    print(f"logical cores: {main.psutil.cpu_count()}")
+    print(f"{'section':>12} {'psutil (us)':>12} {'procfs (us)':>12} {'speedup':>8}")
+    for name, psutil_path, procfs_path in cases:
+        slow, fast = _time_per_call(psutil_path) * 1e6, _time_per_call(procfs_path) * 1e6
+        print(f"{name:>12} {slow:>12.1f} {fast:>12.1f} {slow / fast:>7.1f}x")
+
+
+BENCHMARKS = {
+    "json": bench_json,
+    "nvml": bench_nvml,
+    "procfs": bench_procfs,
+}
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
@@ -43,7 +43,7 @@ Group=$CURRENT_USER
 WorkingDirectory=$PROJECT_DIR
 Environment="PATH=/usr/bin:/usr/local/bin"
 # Executing via absolute path to uv
-ExecStart=$UV_PATH run gunicorn -w 1 --threads 4 --worker-class gthread -b 0.0.0.0:9999 main:app
+ExecStart=$UV_PATH run gunicorn -w 1 --threads 32 --worker-class gthread -b 0.0.0.0:9999 main:app
 
 Restart=always
 RestartSec=5
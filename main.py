@@ -1,8 +1,19 @@
 import os
 import psutil
 import platform
-import collections
-from flask import Flask, render_template_string, jsonify
+import array
+import functools
+import json
+import mmap
+import operator
+import select
+import signal
+import struct
+import threading
+import time
+import zlib
+from flask import Flask, Response, render_template_string, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 
 # --- ROBUST IMPORT ---
 try:
@@ -12,14 +23,89 @@ except ImportError:
     HAS_NVIDIA_LIB = False
     print("Notice: 'nvidia-ml-py' module not found. Running in CPU-only mode.")
 
+# Optional fast JSON encoders (pip install orjson / msgspec), stdlib json otherwise
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+# Optional binary encoding for scrapers (pip install msgpack), msgspec also provides it
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import fcntl # POSIX only: guards the history file against two writers
+except ImportError:
+    fcntl = None
+
 # --- CONFIGURATION (Production Safe Defaults) ---
+SCHEMA_VERSION = 1 # Bump on breaking changes to the snapshot layout (any encoding)
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 9999))
 UPDATE_INTERVAL = int(os.getenv("UPDATE_INTERVAL", 1000)) # 1 second
-HISTORY_SIZE = 60
+HISTORY_SIZE = 60 # Points in the live graphs
+# Round-robin archives as (step seconds, rows): 1s for 10 min, 10s for 24h, 1 min for 30 days
+HISTORY_ARCHIVES = ((1, 600), (10, 8640), (60, 43200))
+# Memory-mapped history file surviving restarts (empty string = keep history in RAM only)
+HISTORY_FILE = os.getenv("HISTORY_FILE", os.path.join(os.path.expanduser("~"), ".cache", "neurodash", "history.bin"))
 WARNING_THRESHOLD = 75
 DANGER_THRESHOLD = 90
 GPU_POWER_LIMIT = None # Auto-detect
+# /api/processes?sort= names -> row keys; each has a pre-sorted view rebuilt per process refresh
+PROCESS_SORTS = {"mem": "memory_percent", "cpu": "cpu_percent", "vram": "vram_mb", "sm": "sm_percent", "io": "io_mb"}
+PROCESS_LIMIT_MAX = 500
+# Process tree aggregation: a job's root is its topmost ancestor below one of these (or below
+# a process of another user), so a launcher script and all its DataLoader workers add up together
+TREE_BOUNDARIES = frozenset((
+    "systemd", "init", "sshd", "sudo", "su", "login", "bash", "zsh", "sh", "dash", "fish",
+    "tmux: server", "tmux", "screen", "SCREEN", "containerd-shim", "containerd-shim-runc-v2",
+    "supervisord", "jupyter-lab", "jupyter-notebook", "kthreadd"
+))
+PROCESS_GROUPINGS = ("tree", "user", "cgroup")
+# Process panel sort keys: the snapshot carries the top rows by each, the UI re-sorts locally
+PROCESS_PANEL_KEYS = ("memory_percent", "cpu_percent", "vram_mb", "sm_percent", "io_mb")
+INVENTORY_CHECK_INTERVAL = 60 # seconds between cheap hotplug checks of the hardware inventory
+# Interfaces left out of the network section, by name prefix (loopback, per-container veth pairs)
+NET_IGNORE = tuple(p for p in os.getenv("NET_IGNORE", "lo,veth").split(",") if p)
+# Block devices left out of the disk I/O section, by name prefix (partitions are always skipped on Linux)
+DISK_IGNORE = tuple(p for p in os.getenv("DISK_IGNORE", "loop,ram,zram,sr,fd").split(",") if p)
+# Storage: every real mountpoint is reported. Pseudo filesystems are skipped, except /dev/shm
+# (DataLoader workers exchange batches through it)
+STORAGE_IGNORE_FSTYPES = frozenset((
+    "proc", "sysfs", "devtmpfs", "devpts", "tmpfs", "ramfs", "cgroup", "cgroup2", "pstore", "bpf",
+    "securityfs", "debugfs", "tracefs", "configfs", "fusectl", "mqueue", "hugetlbfs", "autofs",
+    "binfmt_misc", "rpc_pipefs", "nsfs", "efivarfs", "selinuxfs", "squashfs", "overlay", "nfsd",
+    "fuse.lxcfs", "fuse.gvfsd-fuse", "fuse.portal"
+))
+STORAGE_ALWAYS_MOUNTS = frozenset(("/", "/dev/shm"))
+STORAGE_PARTITIONS_INTERVAL = 300 # seconds; mount changes are picked up sooner through mountinfo polling
+STORAGE_TIMEOUT = 1.0 # seconds a statvfs may take before its mount is reported stale (hung NFS)
+# Linux: read /proc/stat and /proc/meminfo through kept-open descriptors instead of psutil (auto | off)
+PROCFS_FAST_PATH = os.getenv("PROCFS_FAST_PATH", "auto")
+SSE_KEEPALIVE = 15 # seconds between keep-alive comments on idle streams
+JSON_ENCODER = os.getenv("JSON_ENCODER", "auto") # auto | orjson | msgspec | json
+# Snapshot sections are each filled by their own collector. A section is collected only while
+# some client asked for it recently (DEMAND_TTL) or when it feeds the long-range history
+SECTION_ALIASES = {"gpu": "gpus", "ram": "memory", "disk": "storage", "procs": "processes", "net": "network", "io": "disk_io", "psi": "pressure"}
+ALWAYS_COLLECT = frozenset(s for s in os.getenv("ALWAYS_COLLECT", "cpu,memory,gpus,network,disk_io,pressure").split(",") if s)
+DEMAND_TTL = max(10.0, 5 * UPDATE_INTERVAL / 1000.0) # seconds
+# Longest expected Prometheus scrape interval: /metrics keeps its sections warm between scrapes
+METRICS_SCRAPE_INTERVAL = float(os.getenv("METRICS_SCRAPE_INTERVAL", 60)) # seconds
+# Per-collector sampling interval overrides in seconds, e.g. "processes=5,storage=30,gpus=0.25"
+COLLECTOR_INTERVALS = {k.strip(): float(v) for k, _, v in (item.partition("=") for item in os.getenv("COLLECTOR_INTERVALS", "").split(",")) if v}
+# High-frequency GPU sampling (0 = off). 50-100 Hz catches sub-second stalls that a 1s poll misses;
+# only the per-tick min/mean/max/p95 reach the snapshot, so the payload rate does not change
+GPU_FAST_HZ = float(os.getenv("GPU_FAST_HZ", 0))
+GPU_FAST_WINDOW = 4.0 # seconds of samples kept per ring, more than a publish tick
+# PCIe throughput for GPUs without cumulative PCIe byte counters comes from a slow lane thread.
+# 0 reads the blocking counters inline on every tick
+GPU_PCIE_INTERVAL = float(os.getenv("GPU_PCIE_INTERVAL", 5)) # seconds
+GPU_THROTTLE_EPISODES = 20 # Throttle episodes kept per GPU, newest last
 
 # Colors compliant with your frontend expectations
 COLORS = {
@@ -30,26 +116,501 @@ COLORS = {
     "text_bright": "#ffffff"
 }
 
+# --- JSON ENCODER ---
+
+def _stdlib_json_encode(obj):
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+def pick_json_encoder(preference="auto"):
+    # Returns (name, encode) where encode(obj) -> compact UTF-8 bytes
+    if preference in ("auto", "orjson") and orjson is not None:
+        return "orjson", orjson.dumps
+    if preference in ("auto", "msgspec") and msgspec is not None:
+        return "msgspec", msgspec.json.encode
+    if preference not in ("auto", "json"):
+        print(f"Notice: JSON encoder '{preference}' not available, using stdlib json.")
+    return "json", _stdlib_json_encode
+
+class FastJSONProvider(DefaultJSONProvider):
+    # Flask JSON provider backed by the fastest installed encoder. Compact output only
+    # takes the fast path; anything else (indent, sort_keys...) goes through stdlib json.
+    sort_keys = False
+
+    def __init__(self, app, preference="auto"):
+        super().__init__(app)
+        self.encoder_name, self.encode = pick_json_encoder(preference)
+
+    def dumps(self, obj, **kwargs):
+        if not kwargs or kwargs == {"separators": (",", ":")}:
+            return self.encode(obj).decode()
+        return super().dumps(obj, **kwargs)
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app, JSON_ENCODER)
+
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+def pick_msgpack_encoder():
+    # Returns encode(obj) -> bytes, or None when no MessagePack library is installed
+    if msgpack is not None:
+        return functools.partial(msgpack.packb, use_bin_type=True)
+    if msgspec is not None:
+        return msgspec.msgpack.encode
+    return None
+
+msgpack_encode = pick_msgpack_encoder()
 
 # --- BACKEND MONITORING ENGINE ---
 
+class HistoryStore:
+    # RRD-style multi-resolution history. Each metric owns one ring per archive; a row
+    # consolidates every sample that fell in its time slot as (count, min, max, sum),
+    # packed in one flat float32 array: 16 bytes per row instead of boxed floats in deques.
+    RECORD = 4 # count, min, max, sum (count == 0 marks an empty row)
+    # On-disk layout: header | metric names | last_slot (int64) | rows (float32), native byte order
+    MAGIC = b"NDHIST01"
+    HEADER = struct.Struct("<8sIII44x") # magic, metrics, archives, archives checksum (64 bytes)
+    NAME_SIZE = 32
+
+    def __init__(self, archives=HISTORY_ARCHIVES):
+        self.archives = archives
+        self.metrics = {} # name -> metric index
+        self.data = array.array('f')
+        self.last_slot = array.array('q') # Per (metric, archive): last slot number written
+        self._offsets = []
+        offset = 0
+        for _, rows in archives:
+            self._offsets.append(offset)
+            offset += rows * self.RECORD
+        self._metric_span = offset
+        self._lock = threading.Lock()
+        self._file = None
+        self._mm = None
+
+    def register(self, name):
+        if name not in self.metrics:
+            if self._mm is not None:
+                raise RuntimeError("History metrics must be registered before attaching the file")
+            self.metrics[name] = len(self.metrics)
+            self.data.frombytes(bytes(self._metric_span * self.data.itemsize))
+            self.last_slot.extend([0] * len(self.archives))
+
+    def _layout(self):
+        names = sorted(self.metrics, key=self.metrics.get)
+        header = self.HEADER.pack(self.MAGIC, len(names), len(self.archives), zlib.crc32(repr(self.archives).encode()))
+        name_table = b"".join(n.encode()[:self.NAME_SIZE].ljust(self.NAME_SIZE, b"\0") for n in names)
+        return header + name_table
+
+    def _migrate(self, old):
+        # Copy rows of the metrics we still know from a file with another metric set
+        try:
+            magic, n_metrics, n_archives, checksum = self.HEADER.unpack_from(old)
+        except struct.error:
+            return
+        if magic != self.MAGIC or (n_archives, checksum) != (len(self.archives), zlib.crc32(repr(self.archives).encode())):
+            return
+        names_end = self.HEADER.size + n_metrics * self.NAME_SIZE
+        data_off = names_end + n_metrics * n_archives * 8
+        if len(old) != data_off + n_metrics * self._metric_span * 4:
+            return
+        view = memoryview(old)
+        old_slots = view[names_end:data_off].cast('q')
+        old_data = view[data_off:].cast('f')
+        for m_old in range(n_metrics):
+            start = self.HEADER.size + m_old * self.NAME_SIZE
+            name = bytes(old[start:start + self.NAME_SIZE]).rstrip(b"\0").decode(errors="replace")
+            m = self.metrics.get(name)
+            if m is None:
+                continue
+            self.last_slot[m * n_archives:(m + 1) * n_archives] = array.array('q', old_slots[m_old * n_archives:(m_old + 1) * n_archives])
+            span = self._metric_span
+            self.data[m * span:(m + 1) * span] = array.array('f', old_data[m_old * span:(m_old + 1) * span])
+
+    def attach(self, path):
+        # Back the rings with a fixed-size shared mapping of the file: every update is a plain
+        # store into the page cache (no per-tick write or fsync; the kernel flushes dirty pages,
+        # which also survive a process crash), and a restart with the same metric set maps the
+        # file as-is without parsing anything.
+        layout = self._layout()
+        slots_off = len(layout)
+        data_off = slots_off + len(self.last_slot) * 8
+        size = data_off + len(self.data) * 4
+        f = None
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            f = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), "r+b")
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB) # Another worker owns it
+            if os.fstat(f.fileno()).st_size != size or f.read(slots_off) != layout:
+                # New file or different metric set (e.g. a GPU was added): rebuild, keeping what matches
+                f.seek(0)
+                self._migrate(f.read())
+                f.seek(0)
+                f.truncate()
+                f.write(layout)
+                f.write(self.last_slot.tobytes())
+                f.write(self.data.tobytes())
+                f.flush()
+            mm = mmap.mmap(f.fileno(), size)
+        except OSError as e:
+            if f is not None:
+                f.close()
+            print(f"History persistence disabled ({path}): {e}")
+            return False
+        with self._lock:
+            self._file, self._mm = f, mm
+            self.last_slot = memoryview(mm)[slots_off:data_off].cast('q')
+            self.data = memoryview(mm)[data_off:size].cast('f')
+        return True
+
+    def _base(self, m, a):
+        return m * self._metric_span + self._offsets[a]
+
+    def update(self, name, value, ts):
+        m = self.metrics[name]
+        data = self.data
+        with self._lock:
+            for a, (step, rows) in enumerate(self.archives):
+                slot = int(ts // step)
+                li = m * len(self.archives) + a
+                last = self.last_slot[li]
+                base = self._base(m, a)
+                i = base + (slot % rows) * self.RECORD
+                if slot > last:
+                    # Empty the rows skipped since the previous write (downtime), at most one full ring.
+                    # A metric never written (last == 0) still has the zeroed rings it was created with.
+                    if last:
+                        for s in range(max(last + 1, slot - rows + 1), slot):
+                            data[base + (s % rows) * self.RECORD] = 0.0
+                    data[i] = 1.0
+                    data[i + 1] = data[i + 2] = data[i + 3] = value
+                    self.last_slot[li] = slot
+                elif slot == last:
+                    data[i] += 1.0
+                    if value < data[i + 1]:
+                        data[i + 1] = value
+                    if value > data[i + 2]:
+                        data[i + 2] = value
+                    data[i + 3] += value
+                # slot < last: wall clock stepped backwards, drop the sample
+
+    def tail(self, name, n):
+        # Last n non-empty averages of the finest archive, oldest first (live graphs)
+        m = self.metrics[name]
+        _, rows = self.archives[0]
+        base = self._base(m, 0)
+        data = self.data
+        out = []
+        with self._lock:
+            slot = self.last_slot[m * len(self.archives)]
+            for s in range(slot, max(slot - rows, -1), -1):
+                i = base + (s % rows) * self.RECORD
+                count = data[i]
+                if count:
+                    out.append(round(data[i + 3] / count, 1))
+                    if len(out) == n:
+                        break
+        out.reverse()
+        return [0] * (n - len(out)) + out
+
+    def query(self, name, range_s, now=None):
+        # Pick the finest archive covering the range, return min/avg/max columns (None = no data)
+        m = self.metrics[name]
+        a = next((a for a, (step, rows) in enumerate(self.archives) if step * rows >= range_s), len(self.archives) - 1)
+        step, rows = self.archives[a]
+        base = self._base(m, a)
+        data = self.data
+        end = int((time.time() if now is None else now) // step)
+        count_rows = min(rows, max(1, -(-int(range_s) // step)))
+        mins, avgs, maxs = [], [], []
+        with self._lock:
+            last = self.last_slot[m * len(self.archives) + a]
+            for s in range(end - count_rows + 1, end + 1):
+                i = base + (s % rows) * self.RECORD
+                count = data[i]
+                if s > last or s <= last - rows or not count:
+                    mins.append(None)
+                    avgs.append(None)
+                    maxs.append(None)
+                else:
+                    mins.append(round(data[i + 1], 2))
+                    avgs.append(round(data[i + 3] / count, 2))
+                    maxs.append(round(data[i + 2], 2))
+        return {
+            "metric": name,
+            "step_s": step,
+            "start": (end - count_rows + 1) * step,
+            "min": mins,
+            "avg": avgs,
+            "max": maxs
+        }
+
+class ProcessTable:
+    # Persistent process table keyed by (pid, create_time). psutil.Process objects are
+    # cached across refreshes, so cpu_percent() is measured over the real interval since
+    # the previous refresh (fresh objects always report 0), and static attributes
+    # (name, user) are read once per process instead of once per sweep.
+    def __init__(self):
+        self.entries = {} # (pid, create_time) -> entry
+        self._keys = {} # pid -> (pid, create_time)
+        self.views = {key: [] for key in PROCESS_SORTS.values()} # sort key -> rows, largest first
+        self.groups = {} # grouping -> aggregated rows (every process counts, not just the listed rows)
+        self.refreshed_at = None
+
+    def _track(self, pid):
+        try:
+            proc = psutil.Process(pid)
+            with proc.oneshot():
+                key = (pid, proc.create_time())
+                name = proc.name()
+                try:
+                    username = proc.username()
+                except (psutil.AccessDenied, KeyError):
+                    username = None
+                proc.cpu_percent(interval=None) # Prime the interval counter
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return
+        self._keys[pid] = key
+        # "primed": cpu_percent() was just primed, so this sweep's reading would cover a few ms of jiffies
+        self.entries[key] = {"proc": proc, "pid": pid, "name": name, "username": username, "cgroup": read_cgroup(pid), "primed": True}
+
+    def refresh(self, gpu_usage=None):
+        # Diff the PID list (a single /proc listing) against the table.
+        # gpu_usage (GpuProcessTable.usage) is joined by PID. Every measured process gets a row,
+        # so sorted pages and user/name filters see idle workers too.
+        gpu_usage = gpu_usage or {}
+        pids = set(psutil.pids())
+        known = self._keys.keys()
+        for pid in known - pids:
+            del self.entries[self._keys.pop(pid)]
+        for pid in pids - known:
+            self._track(pid)
+
+        total_ram = psutil.virtual_memory().total
+        now = time.monotonic()
+        rows = []
+        measured = [] # (entry, metrics) of every live process, for the aggregates
+        gone = []
+        for key, entry in self.entries.items():
+            proc = entry["proc"]
+            try:
+                with proc.oneshot():
+                    # Newly tracked: report 0 and measure from the priming call on the next sweep
+                    cpu = 0.0 if entry.pop("primed", False) else proc.cpu_percent(interval=None)
+                    rss = proc.memory_info().rss
+                    entry["ppid"] = proc.ppid() # Same /proc/<pid>/stat read as cpu_percent; follows reparenting
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                gone.append(key)
+                continue
+            except psutil.AccessDenied:
+                continue
+            io = self._io_rate(entry, proc, now)
+            mem = rss / total_ram * 100
+            gpu = gpu_usage.get(entry["pid"], NO_GPU_USAGE)
+            metrics = {
+                "memory_percent": mem,
+                "cpu_percent": cpu,
+                "io_mb": io,
+                "vram_mb": gpu["vram_mb"],
+                "sm_percent": gpu["sm_percent"]
+            }
+            measured.append((entry, metrics))
+            rows.append({"pid": entry["pid"], "name": entry["name"], "username": entry["username"], **metrics})
+        for key in gone:
+            del self.entries[key]
+            self._keys.pop(key[0], None)
+        # Readers (request threads) get whole views swapped in at once, never a half-built one
+        self.views = {key: sorted(rows, key=operator.itemgetter(key), reverse=True) for key in PROCESS_SORTS.values()}
+        self.groups = self._aggregate(measured)
+        self.refreshed_at = time.time()
+
+    def _tree_root(self, entry, roots):
+        # Topmost ancestor below a TREE_BOUNDARIES process, PID 1 or a process of another user
+        path = []
+        while entry["pid"] not in roots:
+            path.append(entry["pid"])
+            parent_key = self._keys.get(entry.get("ppid"))
+            parent = self.entries.get(parent_key) if parent_key else None
+            if (parent is None or parent["pid"] <= 1 or parent["name"] in TREE_BOUNDARIES
+                    or parent["username"] != entry["username"]):
+                roots[entry["pid"]] = entry
+                break
+            entry = parent
+        root = roots[entry["pid"]]
+        for pid in path:
+            roots[pid] = root # Memoized: each process is walked once per refresh
+        return root
+
+    def _aggregate(self, measured):
+        # Sums per job tree, user and cgroup. Memory sums RSS, so pages shared between forked
+        # workers count once per worker (an upper bound; PSS would need a smaps read per process).
+        groups = {grouping: {} for grouping in PROCESS_GROUPINGS}
+        roots = {}
+        for entry, metrics in measured:
+            root = self._tree_root(entry, roots)
+            keys = (
+                ("tree", root["pid"], {"pid": root["pid"], "name": root["name"], "username": root["username"]}),
+                ("user", entry["username"], {"username": entry["username"]}),
+                ("cgroup", entry["cgroup"], {"cgroup": entry["cgroup"]}),
+            )
+            for grouping, key, label in keys:
+                group = groups[grouping].get(key)
+                if group is None:
+                    group = groups[grouping][key] = {**label, "count": 0, **dict.fromkeys(metrics, 0)}
+                group["count"] += 1
+                for name, value in metrics.items():
+                    group[name] += value
+        return {grouping: sorted(found.values(), key=operator.itemgetter("memory_percent"), reverse=True)
+                for grouping, found in groups.items()}
+
+    def query_groups(self, grouping, key, limit, offset=0):
+        rows = sorted(self.groups.get(grouping, ()), key=operator.itemgetter(key), reverse=True)
+        return len(rows), [{k: round(v, 1) if isinstance(v, float) else v for k, v in row.items()}
+                           for row in rows[offset:offset + limit]]
+
+    def _io_rate(self, entry, proc, now):
+        # Disk read+write MB/s since the previous refresh; 0 when /proc/<pid>/io is not readable
+        if entry.get("io") is False:
+            return 0 # Denied once (other users' processes without root): never retried
+        try:
+            counters = proc.io_counters()
+        except (psutil.AccessDenied, AttributeError):
+            entry["io"] = False
+            return 0
+        except psutil.Error:
+            return 0
+        total = counters.read_bytes + counters.write_bytes
+        previous = entry.get("io")
+        entry["io"] = (now, total)
+        if not previous or now <= previous[0]:
+            return 0
+        return round((total - previous[1]) / (now - previous[0]) / (1024**2), 2)
+
+    def top(self, limit, key="memory_percent"):
+        return self.views[key][:limit] # KeyError for a key outside PROCESS_SORTS
+
+    def query(self, key, limit, offset=0, user=None, name=None):
+        # Page of the pre-sorted view, optionally filtered by exact user and name substring
+        rows = self.views[key]
+        if user is not None:
+            rows = [row for row in rows if row["username"] == user]
+        if name:
+            name = name.lower()
+            rows = [row for row in rows if name in row["name"].lower()]
+        return len(rows), rows[offset:offset + limit]
+
+    def top_any(self, limit, keys):
+        # Union of the top `limit` rows by each key (rows at 0 or idle skipped), so a client can
+        # re-sort the panel by any of them without another sweep
+        rows = {}
+        for key in keys:
+            for row in self.top(limit, key):
+                if row[key] and is_busy(row):
+                    rows.setdefault(row["pid"], row)
+        return list(rows.values())
+
+NO_GPU_USAGE = {"vram_mb": 0, "sm_percent": 0}
+
+def is_busy(row):
+    # Noise floor of the compact top-N panel; /api/processes lists every process
+    return row["memory_percent"] > 0.1 or row["cpu_percent"] > 0.1 or row["io_mb"] > 0 or row["vram_mb"] > 0 or row["sm_percent"] > 0
+
+def read_cgroup(pid):
+    # Readable group label from /proc/<pid>/cgroup, read once per process:
+    # "docker:<id12>", "podman:<id12>", the systemd unit ("ssh.service", "session-4.scope"), a slice or "/"
+    try:
+        with open(f"/proc/{pid}/cgroup") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    # cgroup v2 has a single "0::<path>" line; on v1 (or hybrid, where "0::/" is unused) use
+    # the name=systemd hierarchy
+    path = next((line.split(":", 2)[2] for line in lines if line.startswith("0::")), "/")
+    if path == "/":
+        path = next((line.split(":", 2)[2] for line in lines if ":name=systemd:" in line), "/")
+    parts = [part for part in path.split("/") if part]
+    for i, part in enumerate(parts):
+        for prefix, runtime in (("docker-", "docker"), ("libpod-", "podman"), ("cri-containerd-", "containerd")):
+            if part.startswith(prefix):
+                return f"{runtime}:{part[len(prefix):len(prefix) + 12]}"
+        if part == "docker" and i + 1 < len(parts):
+            return f"docker:{parts[i + 1][:12]}"
+    for part in reversed(parts):
+        if part.endswith((".service", ".scope")):
+            return part
+    return parts[-1] if parts else "/"
+
+class GpuProcessTable:
+    # Per-PID VRAM and SM% summed across all GPUs. Swept with the process table (its own,
+    # lower cadence), never per request; NVML PIDs are host PIDs, joined to ProcessTable by PID.
+    def __init__(self, gpus):
+        self.gpus = gpus
+        self.last_sample = {} # gpu index -> NVML timestamp of the newest utilization sample seen
+        self.usage = {} # pid -> {"vram_mb", "sm_percent"}
+
+    def _device_usage(self, gpu):
+        handle = gpu["handle"]
+        vram = {}
+        for running in (pynvml.nvmlDeviceGetComputeRunningProcesses, pynvml.nvmlDeviceGetGraphicsRunningProcesses):
+            try:
+                procs = running(handle)
+            except Exception:
+                continue
+            for proc in procs:
+                # A process with compute and graphics contexts is listed twice with the same memory;
+                # usedGpuMemory is None when the driver cannot tell (WDDM, restricted containers)
+                vram[proc.pid] = max(vram.get(proc.pid, 0), proc.usedGpuMemory or 0)
+        sm = {}
+        try:
+            samples = pynvml.nvmlDeviceGetProcessUtilization(handle, self.last_sample.get(gpu["index"], 0))
+        except Exception:
+            samples = [] # NVML_ERROR_NOT_FOUND: no sample since the last sweep
+        for sample in samples:
+            sm.setdefault(sample.pid, []).append(sample.smUtil)
+            self.last_sample[gpu["index"]] = max(self.last_sample.get(gpu["index"], 0), sample.timeStamp)
+        return vram, {pid: sum(values) / len(values) for pid, values in sm.items()}
+
+    def refresh(self):
+        usage = {}
+        for gpu in self.gpus:
+            if not gpu["available"]:
+                continue
+            try:
+                vram, sm = self._device_usage(gpu)
+            except Exception:
+                continue # Old binding or driver error: this device's processes show NO_GPU_USAGE
+            for pid in vram.keys() | sm.keys():
+                entry = usage.setdefault(pid, {"vram_mb": 0, "sm_percent": 0})
+                entry["vram_mb"] += vram.get(pid, 0) / (1024**2)
+                entry["sm_percent"] += sm.get(pid, 0)
+        for entry in usage.values():
+            entry["vram_mb"] = round(entry["vram_mb"], 0)
+            entry["sm_percent"] = round(entry["sm_percent"], 0)
+        self.usage = usage
+        return usage
+
 class AdvancedSystemMonitor:
     def __init__(self):
-        # OPTIMIZATION: Use deque for O(1) performance on rolling buffers
-        self.history = {
-            "gpu_util": collections.deque([0]*HISTORY_SIZE, maxlen=HISTORY_SIZE),
-            "cpu_util": collections.deque([0]*HISTORY_SIZE, maxlen=HISTORY_SIZE),
-            "ram_util": collections.deque([0]*HISTORY_SIZE, maxlen=HISTORY_SIZE)
-        }
+        # OPTIMIZATION: Fixed-size typed round-robin archives, O(1) per sample
+        self.history = HistoryStore()
+        self.history.register("cpu_util")
+        self.history.register("ram_util")
         self.has_gpu = False
-        self.gpu_handle = None
-        self.gpu_name = "N/A"
+        self.gpus = [] # One entry per NVML device: index, handle, name, own history metric
         self.driver_version = "N/A"
         self.cpu_model = "Unknown CPU"
+        self.process_table = ProcessTable()
 
         self._init_cpu_info()
         self._init_gpu()
+        self.gpu_processes = GpuProcessTable(self.gpus)
+        self.inventory_stale = False # Set from the SIGHUP handler
+        self.refresh_inventory()
+
+        # Collectors may register history metrics: build them before the file layout is fixed
+        self.collectors = {section: cls(self) for section, cls in COLLECTORS.items()}
+        if HISTORY_FILE:
+            self.history.attach(HISTORY_FILE)
 
     def _init_cpu_info(self):
         try:
@@ -66,121 +627,1146 @@ class AdvancedSystemMonitor:
         if HAS_NVIDIA_LIB:
             try:
                 pynvml.nvmlInit()
-                self.gpu_handle = pynvml.nvmlDeviceGetHandleByIndex(0)
-                self.gpu_name = pynvml.nvmlDeviceGetName(self.gpu_handle)
-                if isinstance(self.gpu_name, bytes): 
-                    self.gpu_name = self.gpu_name.decode('utf-8')
                 self.driver_version = pynvml.nvmlSystemGetDriverVersion()
                 if isinstance(self.driver_version, bytes): 
                     self.driver_version = self.driver_version.decode('utf-8')
-                self.has_gpu = True
+                for index in range(pynvml.nvmlDeviceGetCount()):
+                    handle = pynvml.nvmlDeviceGetHandleByIndex(index)
+                    name = pynvml.nvmlDeviceGetName(handle)
+                    if isinstance(name, bytes): 
+                        name = name.decode('utf-8')
+                    self.gpus.append({
+                        "index": index,
+                        "handle": handle,
+                        "name": name,
+                        "available": True,
+                        "metric": f"gpu{index}_util",
+                        "throttle_metric": f"gpu{index}_throttle"
+                    })
+                    self.history.register(f"gpu{index}_util")
+                    self.history.register(f"gpu{index}_throttle")
+                self.has_gpu = bool(self.gpus)
             except Exception as e:
                 print(f"NVIDIA GPU initialization failed: {e}")
 
-    def get_top_processes(self, limit=5):
-        procs = []
+    def _gpu_static(self, gpu):
+        entry = {"index": gpu["index"], "name": gpu["name"], "vram_total_gb": None, "power_limit_w": None,
+                 "sm_clock_max_mhz": None, "mem_clock_max_mhz": None}
+        if not gpu["available"]:
+            return entry
         try:
-            for p in psutil.process_iter(['pid', 'name', 'username', 'memory_percent', 'cpu_percent']):
-                try:
-                    # Optimization: Filter early
-                    if p.info['memory_percent'] > 0.1 or p.info['cpu_percent'] > 0.1:
-                        procs.append(p.info)
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
+            entry["vram_total_gb"] = round(pynvml.nvmlDeviceGetMemoryInfo(gpu["handle"]).total / (1024**3), 0)
         except Exception:
             pass
-        # Sort in place is faster
-        procs.sort(key=lambda x: x['memory_percent'], reverse=True)
-        return procs[:limit]
+        try:
+            entry["sm_clock_max_mhz"] = pynvml.nvmlDeviceGetMaxClockInfo(gpu["handle"], pynvml.NVML_CLOCK_SM)
+            entry["mem_clock_max_mhz"] = pynvml.nvmlDeviceGetMaxClockInfo(gpu["handle"], pynvml.NVML_CLOCK_MEM)
+        except Exception:
+            pass
+        try:
+            if GPU_POWER_LIMIT is not None:
+                entry["power_limit_w"] = GPU_POWER_LIMIT
+            else:
+                entry["power_limit_w"] = round(pynvml.nvmlDeviceGetEnforcedPowerLimit(gpu["handle"]) / 1000.0, 0)
+        except Exception:
+            entry["power_limit_w"] = 0
+        return entry
 
-    def get_full_stats(self):
-        # Non-blocking calls
-        cpu_global = psutil.cpu_percent(interval=None)
-        cpu_cores = psutil.cpu_percent(interval=None, percpu=True)
+    def build_inventory(self):
+        # Facts that only change on hotplug or reconfiguration: read once instead of every tick
         ram = psutil.virtual_memory()
         swap = psutil.swap_memory()
-        disk = psutil.disk_usage('/')
-
-        # Deque handles rotation automatically (O(1))
-        self.history["cpu_util"].append(cpu_global)
-        self.history["ram_util"].append(ram.percent)
-
-        stats = {
+        try:
+            root_total_gb = round(psutil.disk_usage('/').total / (1024**3), 0)
+        except Exception:
+            root_total_gb = None
+        return {
             "os": f"{platform.system()} {platform.release()}",
+            "hostname": platform.node(),
             "cpu": {
                 "model": self.cpu_model,
-                "global_usage": cpu_global,
-                "history": list(self.history["cpu_util"]), # Convert deque to list for JSON
-                "cores": cpu_cores,
-                "count_physical": psutil.cpu_count(logical=False),
+                "count_physical": psutil.cpu_count(logical=False), # Parses /proc/cpuinfo + sysfs
                 "count_logical": psutil.cpu_count(logical=True)
             },
             "memory": {
-                "ram_percent": ram.percent,
-                "ram_used_gb": round(ram.used / (1024**3), 1),
                 "ram_total_gb": round(ram.total / (1024**3), 0),
-                "ram_history": list(self.history["ram_util"]),
-                "swap_percent": swap.percent,
-                "swap_used_gb": round(swap.used / (1024**3), 1),
                 "swap_total_gb": round(swap.total / (1024**3), 0)
             },
-            "storage": {
-                 "root_percent": disk.percent,
-                 "root_used_gb": round(disk.used / (1024**3), 0),
-                 "root_total_gb": round(disk.total / (1024**3), 0),
-            },
-            "processes": self.get_top_processes(),
-            "gpu": {"available": False}
+            "storage": {"root_total_gb": root_total_gb},
+            "driver": self.driver_version,
+            "gpus": [self._gpu_static(gpu) for gpu in self.gpus],
+            "built_at": round(time.time())
         }
 
+    def _hardware_fingerprint(self):
+        # Cheap probes that change on CPU/memory/swap/GPU hotplug
+        gpu_count = len(self.gpus)
         if self.has_gpu:
             try:
-                util = pynvml.nvmlDeviceGetUtilizationRates(self.gpu_handle)
-                mem = pynvml.nvmlDeviceGetMemoryInfo(self.gpu_handle)
-                temp = pynvml.nvmlDeviceGetTemperature(self.gpu_handle, pynvml.NVML_TEMPERATURE_GPU)
-                fan = pynvml.nvmlDeviceGetFanSpeed(self.gpu_handle)
-                
-                try:
-                    power_w = pynvml.nvmlDeviceGetPowerUsage(self.gpu_handle) / 1000.0
-                    if GPU_POWER_LIMIT is not None:
-                        power_lim = GPU_POWER_LIMIT
-                    else:
-                        power_lim = pynvml.nvmlDeviceGetEnforcedPowerLimit(self.gpu_handle) / 1000.0
-                except Exception:
-                    power_w, power_lim = 0, 0
-                
-                try:
-                    tx = pynvml.nvmlDeviceGetPcieThroughput(self.gpu_handle, pynvml.NVML_PCIE_UTIL_TX_BYTES) / (1024**2)
-                    rx = pynvml.nvmlDeviceGetPcieThroughput(self.gpu_handle, pynvml.NVML_PCIE_UTIL_RX_BYTES) / (1024**2)
-                except Exception:
-                    tx, rx = 0, 0
-
-                self.history["gpu_util"].append(util.gpu)
-
-                stats["gpu"] = {
-                    "available": True,
-                    "name": self.gpu_name,
-                    "driver": self.driver_version,
-                    "utilization": util.gpu,
-                    "history": list(self.history["gpu_util"]),
-                    "vram_percent": round((mem.used / mem.total) * 100, 1),
-                    "vram_used_gb": round(mem.used / (1024**3), 1),
-                    "vram_total_gb": round(mem.total / (1024**3), 0),
-                    "temp_c": temp,
-                    "fan_percent": fan,
-                    "power_w": round(power_w, 0),
-                    "power_limit_w": round(power_lim, 0),
-                    "pcie_tx_mb": round(tx, 0),
-                    "pcie_rx_mb": round(rx, 0)
-                }
+                gpu_count = pynvml.nvmlDeviceGetCount()
             except Exception:
-                 # If GPU fails mid-operation, mark unavailable but don't crash
-                 self.has_gpu = False
+                pass
+        return (psutil.cpu_count(logical=True), psutil.virtual_memory().total, psutil.swap_memory().total, gpu_count)
+
+    def refresh_inventory(self):
+        self.inventory = self.build_inventory()
+        self._fingerprint = self._hardware_fingerprint()
+        self._inventory_checked = time.monotonic()
+        self.inventory_stale = False
+
+    def revalidate_inventory(self):
+        # Rebuilds the inventory after SIGHUP, or when the periodic hotplug check sees a change
+        now = time.monotonic()
+        if not self.inventory_stale and now - self._inventory_checked < INVENTORY_CHECK_INTERVAL:
+            return False
+        self._inventory_checked = now
+        fingerprint = self._hardware_fingerprint()
+        if not self.inventory_stale and fingerprint == self._fingerprint:
+            return False
+        if fingerprint[3] != len(self.gpus):
+            print(f"Notice: GPU count changed to {fingerprint[3]}; restart NeuroDash to monitor the new devices.")
+        self.refresh_inventory()
+        return True
+
+    def get_top_processes(self, limit=5):
+        gpu_usage = self.gpu_processes.refresh() if self.has_gpu else None
+        self.process_table.refresh(gpu_usage)
+        keys = PROCESS_PANEL_KEYS if self.has_gpu else PROCESS_PANEL_KEYS[:2]
+        return self.process_table.top_any(limit, keys)
+
+    def static_header(self):
+        return {
+            "schema_version": SCHEMA_VERSION,
+            "os": self.inventory["os"],
+        }
+
+class BackgroundThread:
+    # Lazy start: threads do not survive gunicorn's fork, so (re)spawn on first use in the worker
+    thread_name = "neurodash"
+
+    def __init__(self):
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        raise NotImplementedError
+
+# --- LINUX PROCFS FAST PATH ---
+
+class ProcFile:
+    # One procfs file kept open and re-read from offset 0 with preadv into a reused buffer:
+    # no open/close, no per-read buffer allocation. procfs regenerates the content on each read.
+    def __init__(self, path, size=16384):
+        self.fd = os.open(path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+        self.buf = bytearray(size)
+
+    def read(self):
+        while True:
+            n = os.preadv(self.fd, [self.buf], 0)
+            if n < len(self.buf):
+                return memoryview(self.buf)[:n]
+            self.buf = bytearray(2 * len(self.buf)) # Content filled the buffer: grow and retry
+
+def open_proc_file(path):
+    # None means "use psutil": not Linux, no preadv, fast path disabled or file unreadable
+    if PROCFS_FAST_PATH == "off" or not hasattr(os, "preadv"):
+        return None
+    try:
+        proc_file = ProcFile(path)
+        proc_file.read()
+        return proc_file
+    except OSError:
+        return None
+
+def parse_proc_stat(data):
+    # [(total, busy)] jiffies for the "cpu" line then each "cpuN" line, the way psutil counts them:
+    # user..steal (guest is already in user), busy = total - idle - iowait
+    times = []
+    for line in bytes(data).split(b"\n"):
+        if not line.startswith(b"cpu"):
+            break # cpu lines come first
+        fields = line.split(None, 9)
+        user, nice, system, idle, iowait, irq, softirq, steal = map(int, fields[1:9])
+        total = user + nice + system + idle + iowait + irq + softirq + steal
+        times.append((total, total - idle - iowait))
+    return times
+
+def cpu_percents(previous, current):
+    # Busy share between two parse_proc_stat() samples, rounded and clamped like psutil.cpu_percent
+    percents = []
+    for (total, busy), (last_total, last_busy) in zip(current, previous):
+        elapsed = total - last_total
+        percents.append(round(min(max((busy - last_busy) * 100.0 / elapsed, 0.0), 100.0), 1) if elapsed > 0 else 0.0)
+    return percents
+
+def parse_pressure(data):
+    # /proc/pressure/<resource>: {"some": (avg10, avg60, total_us), "full": (...)}; cpu has no
+    # "full" line before Linux 5.13. Lines look like b"some avg10=0.12 avg60=0.05 avg300=0.01 total=123"
+    result = {}
+    for line in bytes(data).split(b"\n"):
+        kind, _, rest = line.partition(b" ")
+        if kind in (b"some", b"full"):
+            fields = dict(field.split(b"=") for field in rest.split())
+            result[kind.decode()] = (float(fields[b"avg10"]), float(fields[b"avg60"]), int(fields[b"total"]))
+    return result
+
+MEMINFO_KEYS = frozenset((b"MemTotal", b"MemFree", b"MemAvailable", b"Buffers", b"Cached", b"SwapTotal", b"SwapFree"))
+
+def parse_meminfo(data):
+    # {key: bytes} for MEMINFO_KEYS; lines look like b"MemTotal:       65794228 kB"
+    values = {}
+    for line in bytes(data).split(b"\n"):
+        key, _, rest = line.partition(b":")
+        if key in MEMINFO_KEYS:
+            values[key] = int(rest.split()[0]) * 1024
+    return values
+
+# --- COLLECTORS ---
+
+COLLECTORS = {} # section -> Collector subclass, in snapshot order
+
+def register_collector(cls):
+    COLLECTORS[cls.section] = cls
+    return cls
+
+class Collector:
+    # Fills one snapshot section. The sampler's timer wheel runs it every `interval_s`;
+    # `budget` caps the share of one core it may use: when a run costs more, the interval
+    # stretches, so an expensive source never throttles the cheap high-frequency ones.
+    section = None
+    interval_s = UPDATE_INTERVAL / 1000.0
+    budget = None
+
+    def __init__(self, monitor):
+        self.monitor = monitor
+        self.interval_s = COLLECTOR_INTERVALS.get(self.section, self.interval_s)
+        self.avg_cost_s = 0.0
+        self.runs = 0
+
+    def collect(self, now):
+        raise NotImplementedError
+
+    def run(self, now):
+        started = time.perf_counter()
+        data = self.collect(now)
+        cost = time.perf_counter() - started
+        self.avg_cost_s = cost if not self.runs else 0.8 * self.avg_cost_s + 0.2 * cost
+        self.runs += 1
+        return data
+
+    def next_delay(self):
+        if self.budget:
+            return max(self.interval_s, self.avg_cost_s / self.budget)
+        return self.interval_s
+
+@register_collector
+class CpuCollector(Collector):
+    section = "cpu"
+
+    def __init__(self, monitor):
+        super().__init__(monitor)
+        self.stat = open_proc_file("/proc/stat")
+        self.last_times = parse_proc_stat(self.stat.read()) if self.stat else None
+
+    def percents(self):
+        # (global, per core) since the previous call, like psutil.cpu_percent(interval=None)
+        if not self.stat:
+            return psutil.cpu_percent(interval=None), psutil.cpu_percent(interval=None, percpu=True)
+        times = parse_proc_stat(self.stat.read())
+        if len(times) != len(self.last_times): # CPU hotplug: restart the baseline
+            self.last_times = times
+            return 0.0, [0.0] * (len(times) - 1)
+        percents = cpu_percents(self.last_times, times)
+        self.last_times = times
+        return percents[0], percents[1:]
+
+    def collect(self, now):
+        # Non-blocking calls
+        history = self.monitor.history
+        cpu_global, cores = self.percents()
+        history.update("cpu_util", cpu_global, now)
+        static = self.monitor.inventory["cpu"]
+        return {
+            "model": static["model"],
+            "global_usage": cpu_global,
+            "history": history.tail("cpu_util", HISTORY_SIZE),
+            "cores": cores,
+            "count_physical": static["count_physical"],
+            "count_logical": static["count_logical"]
+        }
+
+@register_collector
+class MemoryCollector(Collector):
+    section = "memory"
+
+    def __init__(self, monitor):
+        super().__init__(monitor)
+        self.meminfo = open_proc_file("/proc/meminfo")
+
+    def usage(self):
+        # (ram_total, ram_used, swap_total, swap_used) in bytes, used = total - available like psutil
+        if not self.meminfo:
+            ram = psutil.virtual_memory()
+            swap = psutil.swap_memory()
+            return ram.total, ram.used, swap.total, swap.used
+        info = parse_meminfo(self.meminfo.read())
+        ram_total = info[b"MemTotal"]
+        available = info.get(b"MemAvailable")
+        if available is None: # Kernels before 3.14
+            available = info[b"MemFree"] + info.get(b"Buffers", 0) + info.get(b"Cached", 0)
+        swap_total = info.get(b"SwapTotal", 0)
+        return ram_total, ram_total - available, swap_total, swap_total - info.get(b"SwapFree", 0)
+
+    def collect(self, now):
+        history = self.monitor.history
+        ram_total, ram_used, swap_total, swap_used = self.usage()
+        ram_percent = round(ram_used * 100 / ram_total, 1) if ram_total else 0.0
+        history.update("ram_util", ram_percent, now)
+        return {
+            "ram_percent": ram_percent,
+            "ram_used_gb": round(ram_used / (1024**3), 1),
+            "ram_total_gb": round(ram_total / (1024**3), 0),
+            "ram_history": history.tail("ram_util", HISTORY_SIZE),
+            "swap_percent": round(swap_used * 100 / swap_total, 1) if swap_total else 0.0,
+            "swap_used_gb": round(swap_used / (1024**3), 1),
+            "swap_total_gb": round(swap_total / (1024**3), 0)
+        }
+
+def has_hardware(sysfs_dir, name):
+    # Device backed by hardware (sysfs "device" link). Only these get history rings (0.84 MB
+    # per series), not docker/veth/bridge interfaces or loop/dm/zram devices. Without sysfs
+    # (other platforms) every device counts.
+    return not os.path.isdir(sysfs_dir) or os.path.exists(f"{sysfs_dir}/{name}/device")
+
+class CounterCollector(Collector):
+    # Per-device cumulative counters (psutil namedtuples) turned into per-second rates per tick
+    def __init__(self, monitor):
+        super().__init__(monitor)
+        self.previous = None # (monotonic time, counters) of the last run
+
+    def rates(self, counters, fields):
+        # Yields (device, {field: per-second rate}); zeros on a device's first sample.
+        # A counter that went backwards (device reset) counts as 0.
+        tick = time.monotonic()
+        previous, self.previous = self.previous, (tick, counters)
+        elapsed = tick - previous[0] if previous else 0
+        for device, cur in counters.items():
+            last = previous[1].get(device) if previous else None
+            if last is None or elapsed <= 0:
+                yield device, dict.fromkeys(fields, 0)
+            else:
+                yield device, {f: max(getattr(cur, f, 0) - getattr(last, f, 0), 0) / elapsed for f in fields}
+
+@register_collector
+class NetworkCollector(CounterCollector):
+    section = "network"
+    FIELDS = ("bytes_recv", "bytes_sent", "packets_recv", "packets_sent", "errin", "errout", "dropin", "dropout")
+
+    def __init__(self, monitor):
+        super().__init__(monitor)
+        # Physical interfaces present at startup get history rings; the history layout is fixed once mapped
+        self.metrics = {}
+        for nic in psutil.net_io_counters(pernic=True):
+            if not nic.startswith(NET_IGNORE) and has_hardware("/sys/class/net", nic):
+                self.metrics[nic] = (f"net_{nic}_rx", f"net_{nic}_tx")
+                for metric in self.metrics[nic]:
+                    monitor.history.register(metric)
+
+    def collect(self, now):
+        # One /proc/net/dev read; psutil keeps wrapped 32-bit counters monotonic (nowrap)
+        counters = {nic: c for nic, c in psutil.net_io_counters(pernic=True).items() if not nic.startswith(NET_IGNORE)}
+        history = self.monitor.history
+        nics = []
+        for nic, rate in self.rates(counters, self.FIELDS):
+            rx, tx = rate["bytes_recv"] / 1024**2, rate["bytes_sent"] / 1024**2
+            entry = {
+                "name": nic,
+                "rx_mb": round(rx, 2),
+                "tx_mb": round(tx, 2),
+                "rx_pps": round(rate["packets_recv"]),
+                "tx_pps": round(rate["packets_sent"]),
+                "errors_ps": round(rate["errin"] + rate["errout"], 1),
+                "drops_ps": round(rate["dropin"] + rate["dropout"], 1)
+            }
+            if nic in self.metrics:
+                rx_metric, tx_metric = self.metrics[nic]
+                history.update(rx_metric, rx, now)
+                history.update(tx_metric, tx, now)
+                entry["rx_history"] = history.tail(rx_metric, HISTORY_SIZE)
+                entry["tx_history"] = history.tail(tx_metric, HISTORY_SIZE)
+            nics.append(entry)
+        return nics
+
+def is_whole_disk(name):
+    # /sys/block lists whole devices only: sda yes, sda1 no. Elsewhere keep every device psutil reports
+    if name.startswith(DISK_IGNORE):
+        return False
+    return not os.path.isdir("/sys/block") or os.path.exists(f"/sys/block/{name}")
+
+@register_collector
+class DiskIoCollector(CounterCollector):
+    section = "disk_io"
+    FIELDS = ("read_bytes", "write_bytes", "read_count", "write_count", "read_time", "write_time", "busy_time")
+
+    def __init__(self, monitor):
+        super().__init__(monitor)
+        self.watched = {} # device name -> is_whole_disk, cached (a sysfs stat per new name only)
+        # Hardware disks present at startup get history rings; the history layout is fixed once mapped
+        self.metrics = {}
+        for disk in self._counters():
+            if not has_hardware("/sys/block", disk):
+                continue
+            self.metrics[disk] = tuple(f"disk_{disk}_{kind}" for kind in ("read", "write", "busy"))
+            for metric in self.metrics[disk]:
+                monitor.history.register(metric)
+
+    def _counters(self):
+        try:
+            counters = psutil.disk_io_counters(perdisk=True) or {}
+        except Exception:
+            return {} # No block statistics (some containers, unsupported platforms)
+        for name in counters.keys() - self.watched.keys():
+            self.watched[name] = is_whole_disk(name)
+        return {name: c for name, c in counters.items() if self.watched[name]}
+
+    def collect(self, now):
+        history = self.monitor.history
+        disks = []
+        for disk, rate in self.rates(self._counters(), self.FIELDS):
+            read_mb, write_mb = rate["read_bytes"] / 1024**2, rate["write_bytes"] / 1024**2
+            read_iops, write_iops = rate["read_count"], rate["write_count"]
+            busy = min(rate["busy_time"] / 10, 100.0) # busy_time is in ms (Linux only)
+            ops = read_iops + write_iops
+            await_ms = (rate["read_time"] + rate["write_time"]) / ops if ops else 0
+            entry = {
+                "name": disk,
+                "read_mb": round(read_mb, 2),
+                "write_mb": round(write_mb, 2),
+                "read_iops": round(read_iops),
+                "write_iops": round(write_iops),
+                "busy_percent": round(busy, 1),
+                "await_ms": round(await_ms, 2)
+            }
+            if disk in self.metrics:
+                for metric, value, key in zip(self.metrics[disk], (read_mb, write_mb, busy), ("read_history", "write_history", "busy_history")):
+                    history.update(metric, value, now)
+                    entry[key] = history.tail(metric, HISTORY_SIZE)
+            disks.append(entry)
+        return disks
+
+@register_collector
+class PressureCollector(Collector):
+    # Linux pressure stall information (4.20+, CONFIG_PSI): share of time tasks were stalled
+    # waiting for CPU, memory (reclaim, swap-in, thrashing) or I/O. "some" = at least one task
+    # stalled, "full" = all non-idle tasks stalled at once. Empty where PSI is unavailable.
+    section = "pressure"
+    RESOURCES = ("cpu", "memory", "io")
+
+    def __init__(self, monitor):
+        super().__init__(monitor)
+        self.files = {}
+        for resource in self.RESOURCES:
+            path = f"/proc/pressure/{resource}"
+            if os.path.exists(path):
+                # Kept-open descriptor when the /proc fast path is on, plain path otherwise
+                self.files[resource] = open_proc_file(path) or path
+                monitor.history.register(f"psi_{resource}_some")
+        self.previous = None # (monotonic time, {(resource, kind): total_us}) of the last run
+
+    def collect(self, now):
+        tick = time.monotonic()
+        previous, totals = self.previous, {}
+        elapsed_us = (tick - previous[0]) * 1e6 if previous else 0
+        history = self.monitor.history
+        pressure = {}
+        for resource, proc_file in self.files.items():
+            try:
+                if isinstance(proc_file, str):
+                    with open(proc_file, "rb") as f:
+                        parsed = parse_pressure(f.read())
+                else:
+                    parsed = parse_pressure(proc_file.read())
+            except (OSError, ValueError, KeyError):
+                continue
+            entry = {}
+            for kind, (avg10, avg60, total) in parsed.items():
+                totals[resource, kind] = total
+                last = previous[1].get((resource, kind)) if previous else None
+                # Stall share over this tick from the cumulative counter: reacts faster than avg10
+                stall = min(max(total - last, 0) / elapsed_us * 100, 100.0) if last is not None and elapsed_us > 0 else 0.0
+                entry[kind] = {"avg10": avg10, "avg60": avg60, "stall_percent": round(stall, 2), "total_us": total}
+            if "some" in entry:
+                history.update(f"psi_{resource}_some", entry["some"]["stall_percent"], now)
+                entry["history"] = history.tail(f"psi_{resource}_some", HISTORY_SIZE)
+            pressure[resource] = entry
+        self.previous = (tick, totals)
+        return pressure
+
+class MountProbe:
+    # disk_usage() of one mount in a throwaway daemon thread. statvfs on a dead NFS server blocks
+    # in the kernel and cannot be cancelled, so a hung call is left behind and the mount reported
+    # stale until it returns; at most one call per mount is ever in flight.
+    def __init__(self, partition):
+        self.partition = partition
+        self.usage = None
+        self.error = None
+        self.started = 0.0
+        self.done = threading.Event()
+        self.done.set()
+
+    def start(self):
+        if not self.done.is_set():
+            return False
+        self.done.clear()
+        self.started = time.monotonic()
+        threading.Thread(target=self._run, name="neurodash-statvfs", daemon=True).start()
+        return True
+
+    def _run(self):
+        try:
+            self.usage = psutil.disk_usage(self.partition.mountpoint)
+            self.error = None
+        except Exception as e:
+            self.usage = None
+            self.error = str(e)
+        self.done.set()
+
+    def stale(self, now):
+        return not self.done.is_set() and now - self.started > STORAGE_TIMEOUT
+
+def list_mounts():
+    # Real filesystems, one mountpoint per device (the shortest, so bind mounts do not repeat it)
+    by_device = {}
+    for part in psutil.disk_partitions(all=True):
+        if part.fstype in STORAGE_IGNORE_FSTYPES and part.mountpoint not in STORAGE_ALWAYS_MOUNTS:
+            continue
+        key = part.mountpoint if part.device in ("none", "tmpfs", "") else part.device
+        current = by_device.get(key)
+        if current is None or len(part.mountpoint) < len(current.mountpoint):
+            by_device[key] = part
+    return sorted(by_device.values(), key=lambda part: part.mountpoint)
+
+@register_collector
+class StorageCollector(Collector):
+    section = "storage"
+    interval_s = 30.0 # Capacity moves slowly
+
+    def __init__(self, monitor):
+        super().__init__(monitor)
+        self.probes = {} # mountpoint -> MountProbe, kept across refreshes of the partition list
+        self.listed_at = None
+        # The kernel flags /proc/self/mountinfo with POLLPRI whenever the mount table changes
+        self.mount_poll = None
+        try:
+            self._mountinfo = open("/proc/self/mountinfo")
+            self.mount_poll = select.poll()
+            self.mount_poll.register(self._mountinfo, select.POLLPRI | select.POLLERR)
+        except (OSError, AttributeError):
+            self.mount_poll = None
+
+    def _mounts_changed(self):
+        if self.mount_poll is None:
+            return False
+        return bool(self.mount_poll.poll(0)) # Polling consumes the event
+
+    def _refresh_mounts(self):
+        changed = self._mounts_changed()
+        if not changed and self.listed_at is not None and time.monotonic() - self.listed_at < STORAGE_PARTITIONS_INTERVAL:
+            return
+        self.listed_at = time.monotonic()
+        try:
+            partitions = list_mounts()
+        except Exception as e:
+            print(f"Listing mounts failed: {e}")
+            return
+        probes = {}
+        for part in partitions:
+            probe = self.probes.get(part.mountpoint)
+            if probe is None:
+                probe = MountProbe(part)
+            probe.partition = part
+            probes[part.mountpoint] = probe
+        self.probes = probes
+
+    def collect(self, now):
+        self._refresh_mounts()
+        started = [probe for probe in self.probes.values() if probe.start()]
+        deadline = time.monotonic() + STORAGE_TIMEOUT
+        for probe in started: # Probes run in parallel; a hung one costs the sampler one timeout, once
+            probe.done.wait(max(deadline - time.monotonic(), 0))
+        tick = time.monotonic()
+        mounts = []
+        root = None
+        for mountpoint, probe in self.probes.items():
+            usage = probe.usage
+            entry = {
+                "mountpoint": mountpoint,
+                "device": probe.partition.device,
+                "fstype": probe.partition.fstype,
+                "percent": usage.percent if usage else None,
+                "used_gb": round(usage.used / (1024**3), 1) if usage else None,
+                "total_gb": round(usage.total / (1024**3), 1) if usage else None,
+                "stale": probe.stale(tick) # Values (if any) are from before the mount stopped answering
+            }
+            if probe.error:
+                entry["error"] = probe.error
+            if mountpoint == "/":
+                root = usage
+            mounts.append(entry)
+        return {
+             "root_percent": root.percent if root else None,
+             "root_used_gb": round(root.used / (1024**3), 0) if root else None,
+             "root_total_gb": round(root.total / (1024**3), 0) if root else None,
+             "mounts": mounts
+        }
+
+@register_collector
+class ProcessCollector(Collector):
+    section = "processes"
+    interval_s = 5.0
+    budget = 0.05 # At most 5% of a core, even with thousands of processes
+
+    def collect(self, now):
+        return self.monitor.get_top_processes()
+
+def read_pcie_throughput(handle):
+    # NVML reports KB/s, averaged over a 20ms window it blocks on: call only off the tick path
+    tx = pynvml.nvmlDeviceGetPcieThroughput(handle, pynvml.NVML_PCIE_UTIL_TX_BYTES) / 1024
+    rx = pynvml.nvmlDeviceGetPcieThroughput(handle, pynvml.NVML_PCIE_UTIL_RX_BYTES) / 1024
+    return tx, rx
+
+class PcieLane(BackgroundThread):
+    # Refreshes TX/RX of every GPU lacking PCIe byte counters every `interval_s`; the GPU
+    # collector reads the cached rates, so its tick never waits on the 20ms driver window
+    thread_name = "neurodash-pcie"
+
+    def __init__(self, gpus, interval_s):
+        super().__init__()
+        self.gpus = gpus
+        self.interval_s = interval_s
+        self.rates = {} # gpu index -> (tx, rx) in MB/s
+
+    def _run(self):
+        while True:
+            for gpu in self.gpus:
+                if gpu["available"] and "pcie_counters" not in gpu:
+                    try:
+                        self.rates[gpu["index"]] = read_pcie_throughput(gpu["handle"])
+                    except Exception:
+                        self.rates[gpu["index"]] = (0, 0)
+            time.sleep(self.interval_s)
+
+# NVML field values fetched in one nvmlDeviceGetFieldValues round-trip per device.
+# Utilization, memory, temperature and fan have no field IDs and keep their own calls.
+GPU_FIELDS = (
+    ("power_mw", "NVML_FI_DEV_POWER_INSTANT"),
+    ("pcie_tx_bytes", "NVML_FI_DEV_PCIE_COUNT_TX_BYTES"), # Cumulative: rate from deltas, no blocking
+    ("pcie_rx_bytes", "NVML_FI_DEV_PCIE_COUNT_RX_BYTES"),
+)
+FIELD_VALUE_ATTRS = ("dVal", "uiVal", "ulVal", "ullVal", "sllVal", "siVal", "usVal") # By NVML_VALUE_TYPE_*
+
+# Bits of nvmlDeviceGetCurrentClocksEventReasons (formerly ...ClocksThrottleReasons), same values in every driver
+THROTTLE_REASONS = (
+    (0x1, "gpu_idle"),
+    (0x2, "applications_clocks"),
+    (0x4, "sw_power_cap"),
+    (0x8, "hw_slowdown"),
+    (0x10, "sync_boost"),
+    (0x20, "sw_thermal"),
+    (0x40, "hw_thermal"),
+    (0x80, "hw_power_brake"),
+    (0x100, "display_clocks"),
+)
+# Reasons that cost throughput; idle, application/display clock settings and sync boost are configuration
+THROTTLE_LIMITING = 0x4 | 0x8 | 0x20 | 0x40 | 0x80
+GPU_CLOCK_KEYS = ("sm_clock_mhz", "mem_clock_mhz", "pstate", "throttle_mask")
+
+def throttle_names(mask):
+    return [name for bit, name in THROTTLE_REASONS if mask & bit]
+
+class SampleRing:
+    # Preallocated float ring: one writer thread, one reader, no allocation per sample
+    __slots__ = ("buf", "capacity", "written", "read")
+
+    def __init__(self, capacity):
+        self.buf = array.array('f', bytes(4 * capacity))
+        self.capacity = capacity
+        self.written = 0
+        self.read = 0
+
+    def push(self, value):
+        self.buf[self.written % self.capacity] = value
+        self.written += 1 # Published after the value, so the reader never sees an unwritten slot
+
+    def drain(self):
+        # Samples pushed since the last drain (the newest `capacity` if the reader fell behind)
+        written = self.written
+        start = max(self.read, written - self.capacity)
+        self.read = written
+        return [self.buf[k % self.capacity] for k in range(start, written)]
+
+def summarize(values):
+    ordered = sorted(values)
+    n = len(ordered)
+    return {
+        "min": round(ordered[0], 1),
+        "mean": round(sum(ordered) / n, 1),
+        "max": round(ordered[-1], 1),
+        "p95": round(ordered[-(-95 * n // 100) - 1], 1) # Nearest rank
+    }
+
+class GpuFastSampler(BackgroundThread):
+    # Dedicated thread polling util/power of every GPU at GPU_FAST_HZ into SampleRings.
+    # The GPU collector drains them once per run, so the HTTP side only ever sees aggregates.
+    # PCIe stays out: a throughput read blocks ~20ms per direction, which would stall the loop
+    # for the very sub-second gaps it is meant to catch (the collector reads byte counters or PcieLane).
+    METRICS = ("utilization", "power_w")
+    thread_name = "neurodash-gpu-fast"
+
+    def __init__(self, gpus, hz):
+        super().__init__()
+        self.gpus = gpus
+        self.period_s = 1.0 / hz
+        capacity = max(1, int(hz * GPU_FAST_WINDOW))
+        self.rings = {(gpu["index"], metric): SampleRing(capacity) for gpu in gpus for metric in self.METRICS}
+        self._drained_at = {} # gpu index -> monotonic time of the last drain, to report the achieved rate
+
+    def _sample(self, gpu):
+        handle = gpu["handle"]
+        rings = self.rings
+        index = gpu["index"]
+        try:
+            rings[index, "utilization"].push(pynvml.nvmlDeviceGetUtilizationRates(handle).gpu)
+            rings[index, "power_w"].push(pynvml.nvmlDeviceGetPowerUsage(handle) / 1000.0)
+        except Exception:
+            pass # The regular collector owns availability; a missed sample is just a gap
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while True:
+            for gpu in self.gpus:
+                if gpu["available"]:
+                    self._sample(gpu)
+            next_tick += self.period_s
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic() # Overrun: drop the missed ticks rather than burst
+                delay = 0
+            time.sleep(delay)
+
+    def drain(self, gpu):
+        # Per-metric aggregates of the samples taken since the previous drain, None before the first
+        summary = {}
+        samples = 0
+        for metric in self.METRICS:
+            values = self.rings[gpu["index"], metric].drain()
+            if values:
+                summary[metric] = summarize(values)
+                if metric == "utilization":
+                    samples = len(values)
+        if not samples:
+            return None
+        now = time.monotonic()
+        last = self._drained_at.get(gpu["index"])
+        self._drained_at[gpu["index"]] = now
+        summary["hz"] = round(samples / (now - last)) if last is not None and now > last else None
+        return summary
+
+@register_collector
+class GpuCollector(Collector):
+    section = "gpus"
+
+    def __init__(self, monitor):
+        super().__init__(monitor)
+        self.fast = GpuFastSampler(monitor.gpus, GPU_FAST_HZ) if GPU_FAST_HZ > 0 and monitor.gpus else None
+        self.pcie_lane = PcieLane(monitor.gpus, GPU_PCIE_INTERVAL) if GPU_PCIE_INTERVAL > 0 and monitor.gpus else None
+        # Only the fields this binding knows; an old driver without the call disables the batch per device
+        fields = [(key, getattr(pynvml, name)) for key, name in GPU_FIELDS if hasattr(pynvml, name)] if monitor.gpus else []
+        self.field_keys = tuple(key for key, _ in fields)
+        self.field_ids = [field_id for _, field_id in fields]
+        self.read_reasons = (getattr(pynvml, "nvmlDeviceGetCurrentClocksEventReasons", None)
+                             or getattr(pynvml, "nvmlDeviceGetCurrentClocksThrottleReasons", None)) if monitor.gpus else None
+
+    def collect(self, now):
+        # Collection cost is linear in the number of devices: one pass of calls per handle
+        if self.fast:
+            self.fast.start()
+        return [self.sample(gpu, now) for gpu in self.monitor.gpus]
+
+    def sample(self, gpu, now):
+        if not gpu["available"]:
+            return {"index": gpu["index"], "name": gpu["name"], "available": False}
+        handle = gpu["handle"]
+        try:
+            util = pynvml.nvmlDeviceGetUtilizationRates(handle)
+            mem = pynvml.nvmlDeviceGetMemoryInfo(handle)
+            temp = pynvml.nvmlDeviceGetTemperature(handle, pynvml.NVML_TEMPERATURE_GPU)
+            try:
+                fan = pynvml.nvmlDeviceGetFanSpeed(handle)
+            except Exception:
+                fan = 0 # Passively cooled datacenter cards have no fan
+
+            fields = self.read_fields(gpu)
+            try:
+                if "power_mw" in fields:
+                    power_w = fields["power_mw"] / 1000.0
+                else:
+                    power_w = pynvml.nvmlDeviceGetPowerUsage(handle) / 1000.0
+            except Exception:
+                power_w = 0
+            power_lim = self.monitor.inventory["gpus"][gpu["index"]]["power_limit_w"] or 0 # Changes only via nvidia-smi -pl: SIGHUP
+
+            tx, rx = self.pcie_rates(gpu, fields)
+        except Exception:
+            # If a GPU fails mid-operation, mark only that device unavailable but don't crash
+            gpu["available"] = False
+            return {"index": gpu["index"], "name": gpu["name"], "available": False}
 
+        clocks = self.read_clocks(gpu)
+        limiting = clocks["throttle_mask"] & THROTTLE_LIMITING
+        self.track_throttle(gpu, limiting, now)
+        history = self.monitor.history
+        history.update(gpu["metric"], util.gpu, now)
+        history.update(gpu["throttle_metric"], 100 if limiting else 0, now) # Averages to % of time throttled
+        inventory = self.monitor.inventory["gpus"][gpu["index"]]
+
+        stats = {
+            "index": gpu["index"],
+            "available": True,
+            "name": gpu["name"],
+            "driver": self.monitor.driver_version,
+            "utilization": util.gpu,
+            "history": self.monitor.history.tail(gpu["metric"], HISTORY_SIZE),
+            "vram_percent": round((mem.used / mem.total) * 100, 1),
+            "vram_used_gb": round(mem.used / (1024**3), 1),
+            "vram_total_gb": round(mem.total / (1024**3), 0),
+            "temp_c": temp,
+            "fan_percent": fan,
+            "power_w": round(power_w, 0),
+            "power_limit_w": round(power_lim, 0),
+            "pcie_tx_mb": round(tx, 0),
+            "pcie_rx_mb": round(rx, 0),
+            "sm_clock_mhz": clocks["sm_clock_mhz"],
+            "sm_clock_max_mhz": inventory.get("sm_clock_max_mhz"),
+            "mem_clock_mhz": clocks["mem_clock_mhz"],
+            "pstate": clocks["pstate"],
+            "throttle_reasons": throttle_names(clocks["throttle_mask"]),
+            "throttled": bool(limiting),
+            "throttle_history": history.tail(gpu["throttle_metric"], HISTORY_SIZE),
+            "throttle_episodes": [dict(episode) for episode in gpu["throttle_episodes"]], # Copies: the open one keeps changing
+            "throttled_seconds": round(gpu["throttled_s"], 1)
+        }
+        if self.fast:
+            stats["fast"] = self.fast.drain(gpu)
         return stats
 
+    def read_clocks(self, gpu):
+        # Current clocks, P-state and clock event reasons. A call that fails once (unsupported on
+        # this board or driver) is not retried, like the field batch; its value stays None (mask 0).
+        handle = gpu["handle"]
+        failed = gpu.setdefault("clock_failed", set())
+        calls = {
+            "sm_clock_mhz": lambda: pynvml.nvmlDeviceGetClockInfo(handle, pynvml.NVML_CLOCK_SM),
+            "mem_clock_mhz": lambda: pynvml.nvmlDeviceGetClockInfo(handle, pynvml.NVML_CLOCK_MEM),
+            "pstate": lambda: pynvml.nvmlDeviceGetPerformanceState(handle),
+            "throttle_mask": lambda: self.read_reasons(handle),
+        }
+        if not self.read_reasons:
+            failed.add("throttle_mask")
+        clocks = {"sm_clock_mhz": None, "mem_clock_mhz": None, "pstate": None, "throttle_mask": 0}
+        for key in GPU_CLOCK_KEYS:
+            if key not in failed:
+                try:
+                    clocks[key] = calls[key]()
+                except Exception:
+                    failed.add(key)
+        if clocks["pstate"] == 32: # NVML_PSTATE_UNKNOWN
+            clocks["pstate"] = None
+        return clocks
+
+    def track_throttle(self, gpu, limiting, now):
+        # Consecutive ticks with a limiting reason form one episode {start, end, reasons};
+        # "end" stays None while it lasts. Time between two throttled ticks counts as throttled.
+        episodes = gpu.setdefault("throttle_episodes", [])
+        open_episode = episodes[-1] if episodes and episodes[-1]["end"] is None else None
+        last = gpu.get("throttle_checked")
+        gpu["throttle_checked"] = now
+        gpu["throttled_s"] = gpu.get("throttled_s", 0.0)
+        if limiting and open_episode and last is not None:
+            gpu["throttled_s"] += now - last # The closing interval (throttled -> clear) is not counted
+        if limiting:
+            if open_episode is None:
+                open_episode = {"start": round(now, 1), "end": None, "reasons": []}
+                episodes.append(open_episode)
+                del episodes[:-GPU_THROTTLE_EPISODES]
+            open_episode["reasons"] = sorted(set(open_episode["reasons"]).union(throttle_names(limiting)))
+        elif open_episode:
+            open_episode["end"] = round(now, 1)
+
+    def read_fields(self, gpu):
+        # {key: value} for every batched field the device answered; {} once the batch call is unsupported
+        if not self.field_ids or gpu.get("fields") is False:
+            return {}
+        try:
+            values = pynvml.nvmlDeviceGetFieldValues(gpu["handle"], self.field_ids)
+        except Exception:
+            gpu["fields"] = False
+            return {}
+        return {key: getattr(value.value, FIELD_VALUE_ATTRS[value.valueType])
+                for key, value in zip(self.field_keys, values) if value.nvmlReturn == 0} # NVML_SUCCESS
+
+    def pcie_rates(self, gpu, fields):
+        if "pcie_tx_bytes" in fields and "pcie_rx_bytes" in fields:
+            now = time.monotonic()
+            tx_bytes, rx_bytes = fields["pcie_tx_bytes"], fields["pcie_rx_bytes"]
+            previous = gpu.get("pcie_counters")
+            gpu["pcie_counters"] = (now, tx_bytes, rx_bytes)
+            if previous and now > previous[0] and tx_bytes >= previous[1] and rx_bytes >= previous[2]:
+                elapsed = now - previous[0]
+                gpu["pcie_rates"] = ((tx_bytes - previous[1]) / elapsed / (1024**2), (rx_bytes - previous[2]) / elapsed / (1024**2))
+            return gpu.get("pcie_rates", (0, 0)) # First read or counter wrap: keep the last rate
+        if self.pcie_lane:
+            self.pcie_lane.start()
+            return self.pcie_lane.rates.get(gpu["index"], (0, 0))
+        try:
+            return read_pcie_throughput(gpu["handle"])
+        except Exception:
+            return 0, 0
+
+SECTIONS = tuple(COLLECTORS)
+
 monitor = AdvancedSystemMonitor()
 
+# --- BACKGROUND SAMPLER ---
+
+class TimerWheel:
+    # Hashed timer wheel: scheduling is O(1) and each tick only visits the slot that is due
+    def __init__(self, tick_s, slots=512):
+        self.tick_s = tick_s
+        self.slots = [[] for _ in range(slots)]
+        self.position = 0
+
+    def schedule(self, item, delay_s):
+        ticks = max(1, round(delay_s / self.tick_s))
+        rounds = (ticks - 1) // len(self.slots) # Full turns to wait before the slot is due
+        self.slots[(self.position + ticks) % len(self.slots)].append([rounds, item])
+
+    def advance(self):
+        self.position = (self.position + 1) % len(self.slots)
+        due, pending = [], []
+        for entry in self.slots[self.position]:
+            if entry[0]:
+                entry[0] -= 1
+                pending.append(entry)
+            else:
+                due.append(entry[1])
+        self.slots[self.position] = pending
+        return due
+
+MIN_WHEEL_TICK = 0.01 # seconds
+
+class StatsSampler(BackgroundThread):
+    # Single producer: one thread runs every collector on its own interval (timer wheel)
+    # and publishes a snapshot of the latest sections every `interval_s`. Request handlers
+    # only read the latest reference, so their cost is O(1) no matter how many dashboards
+    # are open, and history keeps a steady cadence.
+    PUBLISH = "publish"
+    thread_name = "neurodash-sampler"
+
+    def __init__(self, monitor, interval_s, always=ALWAYS_COLLECT):
+        super().__init__()
+        self.monitor = monitor
+        self.collectors = monitor.collectors
+        self.interval_s = interval_s
+        self.always = always
+        self.current = (0, None) # (seq, snapshot) swapped atomically, never mutated after publish
+        self.sections = {} # section -> latest collected value
+        self.errors = {} # section -> message of its last failed run, cleared by the next success
+        self._demand = {} # section -> monotonic time until which some client still wants it
+        self._cond = threading.Condition()
+        tick = min([interval_s] + [c.interval_s for c in self.collectors.values()])
+        self.wheel = TimerWheel(max(tick, MIN_WHEEL_TICK))
+
+    def demand(self, sections, ttl=DEMAND_TTL):
+        # A demand also covers the collector's own interval: a slow section (storage every 30s)
+        # is still wanted when it next comes due, so its value is never dropped between polls
+        now = time.monotonic()
+        for section in sections:
+            expires = now + ttl + self.collectors[section].interval_s
+            if expires > self._demand.get(section, 0):
+                self._demand[section] = expires
+
+    def wanted(self):
+        now = time.monotonic()
+        return tuple(s for s in SECTIONS if s in self.always or self._demand.get(s, 0) > now)
+
+    def _collect(self, collector, wanted, now):
+        if collector.section not in wanted:
+            # Cold section: drop its stale value and check again next tick
+            self.sections.pop(collector.section, None)
+            self.errors.pop(collector.section, None)
+            self.wheel.schedule(collector, self.wheel.tick_s)
+            return
+        try:
+            self.sections[collector.section] = collector.run(now)
+            self.errors.pop(collector.section, None)
+        except Exception as e:
+            if collector.section not in self.errors:
+                print(f"Collector '{collector.section}' failed: {e}")
+            self.errors[collector.section] = str(e) or type(e).__name__
+        self.wheel.schedule(collector, collector.next_delay())
+
+    def _publish(self):
+        self.monitor.revalidate_inventory()
+        stats = self.monitor.static_header()
+        for section in SECTIONS:
+            if section in self.sections:
+                stats[section] = self.sections[section]
+        if self.errors:
+            stats["errors"] = dict(self.errors)
+        with self._cond:
+            self.current = (self.current[0] + 1, stats)
+            self._cond.notify_all()
+
+    def _run(self):
+        wanted = self.wanted()
+        now = time.time()
+        for collector in self.collectors.values():
+            self._collect(collector, wanted, now)
+        self._publish()
+        self.wheel.schedule(self.PUBLISH, self.interval_s)
+
+        next_tick = time.monotonic()
+        while True:
+            next_tick += self.wheel.tick_s
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                # Overran the tick (slow collector): skip missed ticks instead of bursting
+                next_tick = time.monotonic()
+                delay = 0
+            time.sleep(delay)
+
+            due = self.wheel.advance()
+            if not due:
+                continue
+            wanted = self.wanted()
+            now = time.time()
+            publish = False
+            for item in due:
+                if item is self.PUBLISH:
+                    publish = True # After the collectors due on the same tick
+                else:
+                    self._collect(item, wanted, now)
+            if publish:
+                try:
+                    self._publish()
+                except Exception as e:
+                    print(f"Sampler publish failed: {e}")
+                self.wheel.schedule(self.PUBLISH, self.interval_s)
+
+    def latest(self, sections=None, timeout=5.0, ttl=DEMAND_TTL):
+        # A section nobody asked for lately is not collected: the first request for it
+        # waits (about a tick) for a snapshot that has it, or that reports it failing
+        sections = sections or SECTIONS
+        self.demand(sections, ttl)
+
+        def ready(snapshot):
+            return snapshot is not None and all(s in snapshot or s in snapshot.get("errors", ()) for s in sections)
+
+        seq, snapshot = self.current
+        if not ready(snapshot):
+            self.start()
+            with self._cond:
+                self._cond.wait_for(lambda: ready(self.current[1]), timeout)
+            seq, snapshot = self.current
+        return seq, snapshot
+
+    def wait_next(self, seq, timeout, sections=None):
+        # Blocks until a snapshot newer than `seq` is published (or timeout)
+        self.demand(sections or SECTIONS)
+        self.start()
+        with self._cond:
+            self._cond.wait_for(lambda: self.current[0] > seq, timeout)
+            return self.current
+
+    def describe(self):
+        wanted = self.wanted()
+        return [{
+            "section": c.section,
+            "interval_s": c.interval_s,
+            "effective_interval_s": round(c.next_delay(), 3),
+            "budget": c.budget,
+            "avg_cost_ms": round(c.avg_cost_s * 1000, 2),
+            "runs": c.runs,
+            "active": c.section in wanted,
+            "error": self.errors.get(c.section)
+        } for c in self.collectors.values()]
+
+sampler = StatsSampler(monitor, UPDATE_INTERVAL / 1000.0)
+
+def _mark_inventory_stale(signum, frame):
+    # `kill -HUP <pid>` after changing hardware or power limits; rebuilt on the next publish
+    monitor.inventory_stale = True
+
+try:
+    signal.signal(signal.SIGHUP, _mark_inventory_stale)
+except (AttributeError, ValueError):
+    pass # No SIGHUP on Windows; handlers can only be installed from the main thread
+
+# --- DELTA ENCODING ---
+# Wire format for `/api/stream?delta=1`: the first frame is the full snapshot (static
+# descriptor included), then each tick only carries what changed:
+#   {"key": scalar}        -> replace the value
+#   {"key": {...}}         -> merge recursively (lists of dicts are indexed "0", "1", ...)
+#   {"key": {"=": value}}  -> replace the whole subtree
+#   {"key": {"+": [...]}}  -> append points to a history ring (and drop as many from the front)
+# Static fields (os, model, core counts, totals...) never change, so they never reappear.
+
+HISTORY_KEYS = frozenset(("history", "ram_history", "rx_history", "tx_history", "read_history", "write_history", "busy_history",
+                          "throttle_history"))
+MAX_HISTORY_SHIFT = 5 # Beyond this many new points, resend the whole ring
+
+def _history_delta(old, new):
+    if len(old) == len(new):
+        for shift in range(1, min(MAX_HISTORY_SHIFT, len(new)) + 1):
+            if old[shift:] == new[:-shift]:
+                return {"+": new[-shift:]}
+    return {"=": new}
+
+def _list_delta(old, new):
+    # Element-wise diff for same-shaped lists of dicts (e.g. one entry per device)
+    if len(old) != len(new) or not all(isinstance(o, dict) and isinstance(n, dict) for o, n in zip(old, new)):
+        return new
+    delta = {}
+    for i, (o, n) in enumerate(zip(old, new)):
+        if o != n:
+            delta[str(i)] = diff_stats(o, n)
+    return delta
+
+def diff_stats(prev, cur):
+    if prev.keys() - cur.keys():
+        return {"=": cur} # Keys disappeared (e.g. GPU lost): replace the subtree
+    delta = {}
+    for key, value in cur.items():
+        old = prev.get(key)
+        if old == value:
+            continue
+        if isinstance(old, list) and isinstance(value, list):
+            delta[key] = _history_delta(old, value) if key in HISTORY_KEYS else _list_delta(old, value)
+        elif isinstance(old, dict) and isinstance(value, dict):
+            delta[key] = diff_stats(old, value)
+        elif isinstance(value, dict):
+            delta[key] = {"=": value}
+        else:
+            delta[key] = value
+    return delta
+
 # --- FRONTEND (EXACTLY AS PROVIDED) ---
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -214,6 +1800,8 @@ HTML_TEMPLATE = """
         .header { display: flex; justify-content: space-between; align-items: center; margin-bottom: 20px; padding: 0 10px;}
         .header h1 { margin: 0; font-size: 1.5rem; text-transform: uppercase; letter-spacing: 2px;}
         .header .sub-info { font-size: 0.8rem; color: var(--text-dim); text-align: right;}
+        .pressure-strip { display: flex; gap: 18px; max-width: 1400px; margin: -10px auto 15px; padding: 0 10px; font-size: 0.75rem; color: var(--text-dim); font-family: monospace;}
+        .pressure-strip b { color: var(--text-bright); font-weight: normal;}
 
         .dashboard-grid {
             display: grid;
@@ -268,6 +1856,10 @@ HTML_TEMPLATE = """
         .core-bar-container { background-color: #111; height: 100%; width: 100%; position: relative; overflow: hidden;}
         .core-bar-fill { position: absolute; bottom: 0; left:0; width: 100%; background-color: var(--nvidia-green); transition: height 0.3s ease;}
         
+        .card.compact canvas.gauge { width: 130px; height: 130px; }
+        .card.compact .big-value { font-size: 1.8rem; }
+        .card.compact canvas.graph { height: 60px; }
+
         .storage-section { margin-top: 20px; display: flex; gap: 20px;}
         .mini-gauge-container { text-align: center; width: 50%; background: #1a1a1a; padding: 15px; border-radius: 8px;}
 
@@ -275,6 +1867,11 @@ HTML_TEMPLATE = """
         th { text-align: left; color: var(--text-dim); border-bottom: 1px solid #333; padding: 8px 0; font-size: 0.75rem;}
         td { padding: 6px 0; border-bottom: 1px solid #222; }
         .proc-mem { color: var(--nvidia-green); font-weight: bold; }
+        th.sortable { cursor: pointer; }
+        .proc-toggle { float: right; cursor: pointer; color: var(--text-dim); font-size: 0.75rem; margin-left: 10px; }
+        select.proc-toggle { background: transparent; border: none; }
+        th.sortable.active { color: var(--text-bright); }
+        table.no-gpu .gpu-col { display: none; }
         .proc-name { color: #fff; }
 
         @media (max-width: 768px) {
@@ -296,60 +1893,59 @@ HTML_TEMPLATE = """
         <h1><span style="color: var(--nvidia-green)">AI</span> WORKSTATION MONITOR</h1>
         <div class="sub-info" id="osInfo">Initializing...</div>
     </div>
+    <div class="pressure-strip" id="pressureStrip" style="display:none"></div>
 
     <div class="dashboard-grid">
         
-        <div class="card" id="gpuCard">
+        <div id="gpuCards" style="display: contents;"></div>
+
+        <div class="card" id="netCard">
             <div class="card-header">
-                <span class="card-title">GPU Accelerator</span>
-                <span class="card-subtitle" id="gpuName">No GPU Detected</span>
+                <span class="card-title">Network</span>
+                <span class="card-subtitle" id="netTotal">-</span>
             </div>
-            <div class="split-layout">
-                <div class="gauge-side">
-                    <canvas id="gpuUtilGauge" class="gauge" width="180" height="180"></canvas>
-                    <div class="big-value-container">
-                        <span class="big-value" id="gpuUtilVal">0</span><span class="big-unit">%</span>
-                        <div class="sub-value">Compute Load</div>
-                    </div>
-                </div>
-                <div class="gauge-side">
-                     <canvas id="vramGauge" class="gauge" width="180" height="180"></canvas>
-                     <div class="big-value-container">
-                         <span class="big-value" id="vramVal">0</span><span class="big-unit">GB</span>
-                         <div class="sub-value" id="vramTotal">of 0 GB</div>
-                     </div>
-                </div>
+            <table>
+                <thead>
+                    <tr>
+                        <th>IFACE</th>
+                        <th style="text-align:right">RX MB/s</th>
+                        <th style="text-align:right">TX MB/s</th>
+                        <th style="text-align:right">PKT/s</th>
+                        <th style="text-align:right">ERR/DROP</th>
+                    </tr>
+                </thead>
+                <tbody id="netTable"></tbody>
+            </table>
+            <div style="margin-top:15px;">
+                <div class="graph-label" id="netGraphLabel">Throughput (60s)</div>
+                <canvas id="netGraph" class="graph" width="400" height="100"></canvas>
             </div>
-            <div class="metrics-grid">
-                <div class="metric-box">
-                    <span class="label">TEMP</span>
-                    <span class="value" id="gpuTemp">0</span><span class="unit">°C</span>
-                </div>
-                <div class="metric-box">
-                    <span class="label">POWER</span>
-                    <span class="value" id="gpuPower">0</span><span class="unit">W</span>
-                </div>
-                 <div class="metric-box">
-                    <span class="label">FAN</span>
-                    <span class="value" id="gpuFan">0</span><span class="unit">%</span>
-                </div>
-                 <div class="metric-box">
-                    <span class="label">DRIVER</span>
-                    <span class="value" style="font-size: 0.9rem;" id="gpuDriver">N/A</span>
-                </div>
-                <div class="metric-box">
-                    <span class="label">PCIe TX</span>
-                    <span class="value" id="pcieTx">0</span><span class="unit">MB/s</span>
-                </div>
-                <div class="metric-box">
-                    <span class="label">PCIe RX</span>
-                    <span class="value" id="pcieRx">0</span><span class="unit">MB/s</span>
-                </div>
+        </div>
+
+        <div class="card" id="diskCard">
+            <div class="card-header">
+                <span class="card-title">Disk I/O</span>
+                <span class="card-subtitle" id="diskTotal">-</span>
+            </div>
+            <table>
+                <thead>
+                    <tr>
+                        <th>DEVICE</th>
+                        <th style="text-align:right">READ MB/s</th>
+                        <th style="text-align:right">WRITE MB/s</th>
+                        <th style="text-align:right">IOPS</th>
+                        <th style="text-align:right">BUSY</th>
+                        <th style="text-align:right">AWAIT</th>
+                    </tr>
+                </thead>
+                <tbody id="diskTable"></tbody>
+            </table>
+            <div style="margin-top:15px;">
+                <div class="graph-label" id="diskGraphLabel">Throughput (60s)</div>
+                <canvas id="diskGraph" class="graph" width="400" height="100"></canvas>
+                <div class="graph-label" id="diskBusyLabel">Busy (60s)</div>
+                <canvas id="diskBusyGraph" class="graph" width="400" height="50"></canvas>
             </div>
-             <div style="margin-top:15px;">
-                 <div class="graph-label">GPU Load History (60s)</div>
-                 <canvas id="gpuGraph" class="graph" width="400" height="100"></canvas>
-             </div>
         </div>
 
         <div class="card">
@@ -401,15 +1997,26 @@ HTML_TEMPLATE = """
                      <div class="sub-value"><span id="swapUsed">0</span> / <span id="swapTotal">0</span> GB</div>
                 </div>
             </div>
+            <table id="mountTable"></table>
             <div style="margin-top: 25px; border-top: 1px solid #222; padding-top: 15px;">
                 <span class="card-title" style="font-size: 0.9rem;">Top Resource Consumers</span>
+                <span class="proc-toggle" id="procToggle">show top 50</span>
+                <select class="proc-toggle" id="procGroup">
+                    <option value="none">per process</option>
+                    <option value="tree">per job tree</option>
+                    <option value="user">per user</option>
+                    <option value="cgroup">per cgroup</option>
+                </select>
                 <table>
                     <thead>
                         <tr>
                             <th>USER</th>
                             <th>PROCESS</th>
-                            <th style="text-align:right">CPU</th>
-                            <th style="text-align:right">MEM</th>
+                            <th class="sortable" data-sort="cpu_percent" style="text-align:right">CPU</th>
+                            <th class="sortable" data-sort="memory_percent" style="text-align:right">MEM</th>
+                            <th class="sortable gpu-col" data-sort="vram_mb" style="text-align:right">VRAM</th>
+                            <th class="sortable gpu-col" data-sort="sm_percent" style="text-align:right">SM</th>
+                            <th class="sortable" data-sort="io_mb" style="text-align:right">IO</th>
                         </tr>
                     </thead>
                     <tbody id="procTable"></tbody>
@@ -418,6 +2025,64 @@ HTML_TEMPLATE = """
          </div>
     </div> 
 
+    <!-- Cloned once per GPU; element ids get the device index appended -->
+    <template id="gpuCardTemplate">
+            <div class="card gpu-card">
+                <div class="card-header">
+                    <span class="card-title" id="gpuTitle">GPU Accelerator</span>
+                    <span class="card-subtitle" id="gpuName">No GPU Detected</span>
+                </div>
+                <div class="split-layout">
+                    <div class="gauge-side">
+                        <canvas id="gpuUtilGauge" class="gauge" width="180" height="180"></canvas>
+                        <div class="big-value-container">
+                            <span class="big-value" id="gpuUtilVal">0</span><span class="big-unit">%</span>
+                            <div class="sub-value">Compute Load</div>
+                        </div>
+                    </div>
+                    <div class="gauge-side">
+                         <canvas id="vramGauge" class="gauge" width="180" height="180"></canvas>
+                         <div class="big-value-container">
+                             <span class="big-value" id="vramVal">0</span><span class="big-unit">GB</span>
+                             <div class="sub-value" id="vramTotal">of 0 GB</div>
+                         </div>
+                    </div>
+                </div>
+                <div class="metrics-grid">
+                    <div class="metric-box">
+                        <span class="label">TEMP</span>
+                        <span class="value" id="gpuTemp">0</span><span class="unit">°C</span>
+                    </div>
+                    <div class="metric-box">
+                        <span class="label">POWER</span>
+                        <span class="value" id="gpuPower">0</span><span class="unit">W</span>
+                    </div>
+                     <div class="metric-box">
+                        <span class="label">FAN</span>
+                        <span class="value" id="gpuFan">0</span><span class="unit">%</span>
+                    </div>
+                     <div class="metric-box">
+                        <span class="label">DRIVER</span>
+                        <span class="value" style="font-size: 0.9rem;" id="gpuDriver">N/A</span>
+                    </div>
+                    <div class="metric-box">
+                        <span class="label">PCIe TX</span>
+                        <span class="value" id="pcieTx">0</span><span class="unit">MB/s</span>
+                    </div>
+                    <div class="metric-box">
+                        <span class="label">PCIe RX</span>
+                        <span class="value" id="pcieRx">0</span><span class="unit">MB/s</span>
+                    </div>
+                </div>
+                 <div class="graph-label" id="gpuClocks" style="display: none; margin-top: 10px;"></div>
+                 <div class="graph-label" id="gpuFast" style="display: none; margin-top: 10px;"></div>
+                 <div style="margin-top:15px;">
+                     <div class="graph-label">GPU Load History (60s)</div>
+                     <canvas id="gpuGraph" class="graph" width="400" height="100"></canvas>
+                 </div>
+            </div>
+    </template>
+
 <script>
     const NVIDIA_GREEN = "{{ COLORS.safe }}";
     const GRAPH_BLUE = "{{ COLORS.graph_blue }}";
@@ -430,6 +2095,12 @@ HTML_TEMPLATE = """
         text_bright: "{{ COLORS.text_bright }}"
     };
 
+    // For strings the host's users control (mount points, labels, error text) before they go into innerHTML
+    const HTML_ESCAPES = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
+    function escapeHtml(text) {
+        return String(text ?? '').replace(/[&<>"']/g, c => HTML_ESCAPES[c]);
+    }
+
     function drawGauge(canvasId, percentage, color, thin=false) {
         const canvas = document.getElementById(canvasId);
         if (!canvas) return;
@@ -460,7 +2131,8 @@ HTML_TEMPLATE = """
         }
     }
 
-    function drawGraph(canvasId, dataPoints, color) {
+    // maxValue scales non-percent series; clear=false overlays a second series on the same canvas
+    function drawGraph(canvasId, dataPoints, color, maxValue=100, clear=true) {
         const canvas = document.getElementById(canvasId);
         if (!canvas) return;
         const ctx = canvas.getContext('2d');
@@ -468,7 +2140,7 @@ HTML_TEMPLATE = """
         const height = canvas.height;
         const padding = 5;
         
-        ctx.clearRect(0, 0, width, height);
+        if (clear) ctx.clearRect(0, 0, width, height);
         if (dataPoints.length < 2) return;
 
         ctx.beginPath();
@@ -483,7 +2155,7 @@ HTML_TEMPLATE = """
         ctx.moveTo(0, height);
         for (let i = 0; i < dataPoints.length; i++) {
             const val = dataPoints[i];
-            const y = height - (val / 100 * (height - padding*2) + padding);
+            const y = height - (val / maxValue * (height - padding*2) + padding);
             ctx.lineTo(i * step, y);
         }
         ctx.lineTo(width, height);
@@ -492,7 +2164,7 @@ HTML_TEMPLATE = """
         ctx.beginPath();
         for (let i = 0; i < dataPoints.length; i++) {
             const val = dataPoints[i];
-            const y = height - (val / 100 * (height - padding*2) + padding);
+            const y = height - (val / maxValue * (height - padding*2) + padding);
             if (i===0) ctx.moveTo(i * step, y);
             else ctx.lineTo(i * step, y);
         }
@@ -519,30 +2191,283 @@ HTML_TEMPLATE = """
         });
     }
 
-    function updateProcessTable(procs) {
+    // The snapshot holds the top rows by each sortable column: sort and cut locally.
+    // Expanded, the panel pages through /api/processes (server-side pre-sorted views) instead.
+    const PROC_SORTS = { memory_percent: 'mem', cpu_percent: 'cpu', vram_mb: 'vram', sm_percent: 'sm', io_mb: 'io' };
+    let procSortKey = 'memory_percent';
+    let procExpanded = false;
+    let procTimer = null;
+    let lastProcs = [];
+    let lastHasGpu = false;
+
+    let procGroup = 'none';
+
+    function serverProcMode() { return procExpanded || procGroup !== 'none'; }
+
+    function groupLabel(g) {
+        if (procGroup === 'tree') return `${g.name} [${g.pid}] x${g.count}`;
+        if (procGroup === 'cgroup') return `${g.cgroup || '-'} x${g.count}`;
+        return `${g.count} processes`;
+    }
+
+    async function fetchProcesses() {
+        const limit = procExpanded ? 50 : 5;
+        const sort = PROC_SORTS[procSortKey];
+        try {
+            if (procGroup === 'none') {
+                const response = await fetch(`/api/processes?sort=${sort}&limit=${limit}`);
+                renderProcessRows((await response.json()).processes, limit);
+            } else {
+                const response = await fetch(`/api/process_groups?by=${procGroup}&sort=${sort}&limit=${limit}`);
+                const groups = (await response.json()).groups;
+                renderProcessRows(groups.map(g => ({ ...g, username: g.username || '-', name: groupLabel(g) })), limit);
+            }
+        } catch (e) { console.error(e); }
+    }
+
+    function refreshProcMode() {
+        document.getElementById('procToggle').innerText = procExpanded ? 'show top 5' : 'show top 50';
+        clearInterval(procTimer);
+        if (serverProcMode()) {
+            fetchProcesses();
+            procTimer = setInterval(fetchProcesses, 5000); // Server refreshes the process table every 5s
+        } else {
+            renderProcessRows(lastProcs, 5);
+        }
+    }
+
+    document.getElementById('procToggle').addEventListener('click', () => { procExpanded = !procExpanded; refreshProcMode(); });
+    document.getElementById('procGroup').addEventListener('change', e => { procGroup = e.target.value; refreshProcMode(); });
+
+    function updateProcessTable(procs, hasGpu) {
+        lastProcs = procs;
+        lastHasGpu = hasGpu;
+        if (!serverProcMode()) renderProcessRows(procs, 5);
+    }
+
+    function renderProcessRows(procs, limit) {
         const tbody = document.getElementById('procTable');
+        tbody.closest('table').classList.toggle('no-gpu', !lastHasGpu);
+        document.querySelectorAll('th.sortable').forEach(th => th.classList.toggle('active', th.dataset.sort === procSortKey));
+        const rows = procs.slice().sort((a, b) => (b[procSortKey] || 0) - (a[procSortKey] || 0)).slice(0, limit);
         let html = '';
-        procs.forEach(p => {
-            html += `<tr><td>${p.username}</td><td class="proc-name">${p.name.substring(0, 20)}</td><td style="text-align:right">${p.cpu_percent.toFixed(0)}%</td><td style="text-align:right" class="proc-mem">${p.memory_percent.toFixed(1)}%</td></tr>`;
+        rows.forEach(p => {
+            const vram = p.vram_mb >= 1024 ? `${(p.vram_mb / 1024).toFixed(1)} GB` : `${(p.vram_mb || 0).toFixed(0)} MB`;
+            // Names and users come from any local account (a binary can be named "<svg onload=...>")
+            html += `<tr><td>${escapeHtml(p.username)}</td><td class="proc-name">${escapeHtml(p.name.substring(0, 20))}</td><td style="text-align:right">${p.cpu_percent.toFixed(0)}%</td><td style="text-align:right" class="proc-mem">${p.memory_percent.toFixed(1)}%</td>`
+                + `<td style="text-align:right" class="gpu-col">${vram}</td><td style="text-align:right" class="gpu-col">${(p.sm_percent || 0).toFixed(0)}%</td>`
+                + `<td style="text-align:right">${(p.io_mb || 0).toFixed(1)} MB/s</td></tr>`;
         });
         tbody.innerHTML = html;
     }
 
+    document.querySelectorAll('th.sortable').forEach(th => th.addEventListener('click', () => {
+        procSortKey = th.dataset.sort;
+        if (serverProcMode()) fetchProcesses();
+        else renderProcessRows(lastProcs, 5);
+    }));
+
+    function ensureGpuCards(gpus) {
+        const container = document.getElementById('gpuCards');
+        const count = Math.max(gpus.length, 1); // Keep one placeholder card in CPU-only mode
+        if (container.children.length === count) return;
+        container.innerHTML = '';
+        const template = document.getElementById('gpuCardTemplate');
+        for (let i = 0; i < count; i++) {
+            const card = template.content.firstElementChild.cloneNode(true);
+            card.id = `gpuCard${i}`;
+            card.querySelectorAll('[id]').forEach(el => { el.id = el.id + i; });
+            if (gpus.length > 1) {
+                card.classList.add('compact');
+                card.querySelector('.card-title').innerText = `GPU ${gpus[i].index}`;
+            }
+            container.appendChild(card);
+        }
+    }
+
+    // Tint the columns of a graph where flags[k] > 0 (e.g. throttled seconds), opacity by share of the slot
+    function shadeIntervals(canvasId, flags, color) {
+        const canvas = document.getElementById(canvasId);
+        if (!canvas || !flags || flags.length < 2) return;
+        const ctx = canvas.getContext('2d');
+        const step = canvas.width / (flags.length - 1);
+        ctx.fillStyle = color;
+        flags.forEach((v, k) => {
+            if (v <= 0) return;
+            ctx.globalAlpha = 0.15 + 0.25 * Math.min(v, 100) / 100;
+            ctx.fillRect((k - 0.5) * step, 0, step, canvas.height);
+        });
+        ctx.globalAlpha = 1;
+    }
+
+    // Clock event reasons: configuration ones (see THROTTLE_LIMITING server side) are not shown as throttling
+    const BENIGN_REASONS = ['gpu_idle', 'applications_clocks', 'display_clocks', 'sync_boost'];
+    const THERMAL_REASONS = ['sw_thermal', 'hw_thermal', 'hw_slowdown'];
+
+    function updateGpuCard(i, gpu) {
+        const card = document.getElementById(`gpuCard${i}`);
+        if (!gpu || !gpu.available) {
+            card.style.opacity = "0.5";
+            document.getElementById(`gpuName${i}`).innerText = gpu ? `${gpu.name} (UNAVAILABLE)` : "NO NVIDIA GPU";
+            return;
+        }
+        card.style.opacity = "1";
+        document.getElementById(`gpuName${i}`).innerText = gpu.name;
+        drawGauge(`gpuUtilGauge${i}`, gpu.utilization, NVIDIA_GREEN);
+        document.getElementById(`gpuUtilVal${i}`).innerText = gpu.utilization;
+        drawGauge(`vramGauge${i}`, gpu.vram_percent, NVIDIA_GREEN);
+        document.getElementById(`vramVal${i}`).innerText = gpu.vram_used_gb;
+        document.getElementById(`vramTotal${i}`).innerText = `of ${gpu.vram_total_gb} GB`;
+        drawGraph(`gpuGraph${i}`, gpu.history, GRAPH_BLUE);
+        shadeIntervals(`gpuGraph${i}`, gpu.throttle_history, COLORS.danger);
+        document.getElementById(`gpuTemp${i}`).innerText = gpu.temp_c;
+        const powerPercentage = gpu.power_limit_w ? (gpu.power_w / gpu.power_limit_w) * 100 : 0;
+        const powerColor = powerPercentage > DANGER_THRESHOLD ? COLORS.danger : powerPercentage > WARNING_THRESHOLD ? COLORS.warning : COLORS.text_bright;
+        document.getElementById(`gpuPower${i}`).innerHTML = gpu.power_limit_w ? `<span style="color: ${powerColor}">${gpu.power_w} / ${gpu.power_limit_w}</span>` : gpu.power_w;
+        document.getElementById(`gpuFan${i}`).innerText = gpu.fan_percent;
+        document.getElementById(`gpuDriver${i}`).innerText = gpu.driver;
+        document.getElementById(`pcieTx${i}`).innerText = gpu.pcie_tx_mb;
+        document.getElementById(`pcieRx${i}`).innerText = gpu.pcie_rx_mb;
+        // Clocks and throttling: a GPU pinned at 100% load can still lose a third of its throughput here
+        const clocks = document.getElementById(`gpuClocks${i}`);
+        if (gpu.sm_clock_mhz != null) {
+            const limiting = gpu.throttle_reasons.filter(r => !BENIGN_REASONS.includes(r));
+            const throttleColor = limiting.some(r => THERMAL_REASONS.includes(r)) ? COLORS.danger : COLORS.warning;
+            const last = gpu.throttle_episodes.length ? gpu.throttle_episodes[gpu.throttle_episodes.length - 1] : null;
+            clocks.title = last ? `last episode: ${last.reasons.join(', ')} from ${new Date(last.start * 1000).toLocaleTimeString()}`
+                + (last.end ? ` to ${new Date(last.end * 1000).toLocaleTimeString()}` : ' (ongoing)') : 'no throttle episode';
+            clocks.innerHTML = `${gpu.pstate != null ? 'P' + gpu.pstate + ' &middot; ' : ''}SM ${gpu.sm_clock_mhz}${gpu.sm_clock_max_mhz ? ' / ' + gpu.sm_clock_max_mhz : ''} MHz &middot; MEM ${gpu.mem_clock_mhz ?? '-'} MHz`
+                + (gpu.throttled ? ` &middot; <span style="color: ${throttleColor}">THROTTLED: ${limiting.join(', ')}</span>` : '')
+                + (gpu.throttled_seconds ? ` &middot; ${gpu.throttled_seconds.toFixed(0)}s throttled` : '');
+            clocks.style.display = "block";
+        } else {
+            clocks.style.display = "none";
+        }
+        // High-frequency mode: spread of the samples taken since the previous tick
+        const fast = document.getElementById(`gpuFast${i}`);
+        if (gpu.fast && gpu.fast.utilization) {
+            const u = gpu.fast.utilization;
+            const p = gpu.fast.power_w;
+            const dipColor = u.min < u.mean - 30 ? COLORS.warning : COLORS.text_bright;
+            fast.innerHTML = `${gpu.fast.hz ?? '-'} Hz &middot; load min <span style="color: ${dipColor}">${u.min}</span> / avg ${u.mean} / p95 ${u.p95} / max ${u.max} %`
+                + (p ? ` &middot; power p95 ${p.p95} W` : '');
+            fast.style.display = "block";
+        } else {
+            fast.style.display = "none";
+        }
+    }
+
+    // Graph follows the clicked interface, else the busiest one with history
+    let netSelected = null;
+
+    function updateNetwork(nics) {
+        const card = document.getElementById('netCard');
+        card.style.display = nics && nics.length ? '' : 'none';
+        if (!nics || !nics.length) return;
+        let rxTotal = 0, txTotal = 0, html = '';
+        nics.forEach(n => {
+            rxTotal += n.rx_mb;
+            txTotal += n.tx_mb;
+            const faults = n.errors_ps + n.drops_ps;
+            const faultColor = faults > 0 ? COLORS.danger : COLORS.text_bright;
+            html += `<tr data-nic="${escapeHtml(n.name)}" style="cursor:pointer"><td class="proc-name">${escapeHtml(n.name)}</td><td style="text-align:right">${n.rx_mb.toFixed(1)}</td><td style="text-align:right">${n.tx_mb.toFixed(1)}</td>`
+                + `<td style="text-align:right">${n.rx_pps + n.tx_pps}</td><td style="text-align:right; color:${faultColor}">${n.errors_ps} / ${n.drops_ps}</td></tr>`;
+        });
+        const tbody = document.getElementById('netTable');
+        tbody.innerHTML = html;
+        tbody.querySelectorAll('tr').forEach(tr => tr.addEventListener('click', () => { netSelected = tr.dataset.nic; updateNetwork(nics); }));
+        document.getElementById('netTotal').innerText = `RX ${rxTotal.toFixed(1)} / TX ${txTotal.toFixed(1)} MB/s`;
+
+        const nic = pickSeries(nics, netSelected, n => n.rx_history, n => n.tx_history);
+        if (nic) drawPair('netGraph', 'netGraphLabel', nic.name, nic.rx_history, nic.tx_history, 'RX blue, TX green');
+    }
+
+    // Entry to graph: the clicked one, else the busiest of those with history
+    function pickSeries(entries, selected, first, second) {
+        const withHistory = entries.filter(first);
+        if (!withHistory.length) return null;
+        const sum = h => h.reduce((a, b) => a + b, 0);
+        const load = e => sum(first(e)) + sum(second(e));
+        return withHistory.find(e => e.name === selected) || withHistory.reduce((a, b) => load(b) > load(a) ? b : a);
+    }
+
+    // Two MB/s series on one canvas, scaled to their common peak
+    function drawPair(canvasId, labelId, name, first, second, legend) {
+        const peak = Math.max(1, ...first, ...second);
+        document.getElementById(labelId).innerText = `${name} throughput (60s, peak ${peak.toFixed(1)} MB/s): ${legend}`;
+        drawGraph(canvasId, first, GRAPH_BLUE, peak);
+        drawGraph(canvasId, second, NVIDIA_GREEN, peak, false);
+    }
+
+    let diskSelected = null;
+
+    function updateDiskIo(disks) {
+        const card = document.getElementById('diskCard');
+        card.style.display = disks && disks.length ? '' : 'none';
+        if (!disks || !disks.length) return;
+        let readTotal = 0, writeTotal = 0, html = '';
+        disks.forEach(d => {
+            readTotal += d.read_mb;
+            writeTotal += d.write_mb;
+            const busyColor = d.busy_percent > DANGER_THRESHOLD ? COLORS.danger : d.busy_percent > WARNING_THRESHOLD ? COLORS.warning : COLORS.text_bright;
+            html += `<tr data-disk="${escapeHtml(d.name)}" style="cursor:pointer"><td class="proc-name">${escapeHtml(d.name)}</td><td style="text-align:right">${d.read_mb.toFixed(1)}</td><td style="text-align:right">${d.write_mb.toFixed(1)}</td>`
+                + `<td style="text-align:right">${d.read_iops + d.write_iops}</td><td style="text-align:right; color:${busyColor}">${d.busy_percent}%</td><td style="text-align:right">${d.await_ms} ms</td></tr>`;
+        });
+        const tbody = document.getElementById('diskTable');
+        tbody.innerHTML = html;
+        tbody.querySelectorAll('tr').forEach(tr => tr.addEventListener('click', () => { diskSelected = tr.dataset.disk; updateDiskIo(disks); }));
+        document.getElementById('diskTotal').innerText = `R ${readTotal.toFixed(1)} / W ${writeTotal.toFixed(1)} MB/s`;
+
+        const disk = pickSeries(disks, diskSelected, d => d.read_history, d => d.write_history);
+        if (!disk) return;
+        drawPair('diskGraph', 'diskGraphLabel', disk.name, disk.read_history, disk.write_history, 'read blue, write green');
+        // Near 100% busy while the GPUs idle: the epoch is I/O bound
+        document.getElementById('diskBusyLabel').innerText = `${disk.name} busy (60s)`;
+        drawGraph('diskBusyGraph', disk.busy_history, COLORS.warning);
+    }
+
+    function updateMounts(mounts) {
+        let html = '<thead><tr><th>MOUNT</th><th>FS</th><th style="text-align:right">USED / SIZE</th><th style="text-align:right">USE</th></tr></thead><tbody>';
+        (mounts || []).forEach(m => {
+            const pct = m.percent ?? 0;
+            const color = m.stale ? COLORS.danger : pct > DANGER_THRESHOLD ? COLORS.danger : pct > WARNING_THRESHOLD ? COLORS.warning : COLORS.text_bright;
+            const use = m.stale ? 'STALE' : m.percent === null ? 'n/a' : `${pct.toFixed(0)}%`;
+            html += `<tr title="${escapeHtml(m.device)}${m.error ? ' - ' + escapeHtml(m.error) : ''}"><td class="proc-name">${escapeHtml(m.mountpoint)}</td><td>${escapeHtml(m.fstype)}</td>`
+                + `<td style="text-align:right">${m.used_gb ?? '-'} / ${m.total_gb ?? '-'} GB</td><td style="text-align:right; color:${color}">${use}</td></tr>`;
+        });
+        document.getElementById('mountTable').innerHTML = html + '</tbody>';
+    }
+
+    // PSI stall share: a few % is normal under load, sustained double digits means tasks are waiting
+    const PSI_WARNING = 10, PSI_DANGER = 25;
+    const PSI_LABELS = { cpu: 'CPU', memory: 'MEM', io: 'IO' };
+
+    function updatePressure(pressure) {
+        const strip = document.getElementById('pressureStrip');
+        const resources = Object.keys(pressure || {}).filter(r => pressure[r].some);
+        strip.style.display = resources.length ? '' : 'none';
+        if (!resources.length) return;
+        const badge = (kind, v) => {
+            const color = v.stall_percent > PSI_DANGER ? COLORS.danger : v.stall_percent > PSI_WARNING ? COLORS.warning : COLORS.text_bright;
+            return `${kind} <b style="color:${color}">${v.stall_percent.toFixed(1)}%</b>`;
+        };
+        strip.innerHTML = 'PRESSURE ' + resources.map(r => {
+            const p = pressure[r];
+            const title = ['some', 'full'].filter(k => p[k]).map(k => `${k}: avg10 ${p[k].avg10}% / avg60 ${p[k].avg60}%`).join(', ');
+            return `<span title="${title}">${PSI_LABELS[r] || r} ${badge('some', p.some)}${p.full ? ' ' + badge('full', p.full) : ''}</span>`;
+        }).join('');
+    }
+
     let isFirstLoad = true;
 
-    async function updateDashboard() {
+    function renderDashboard(data) {
         try {
-            const response = await fetch('/api/full_stats');
-            const data = await response.json();
-
             if (isFirstLoad) {
                 document.getElementById('osInfo').innerText = data.os;
                 document.getElementById('cpuCountInfo').innerHTML = `
                     <div style="font-size:0.8rem; color:var(--text-bright); margin-bottom:2px;">${data.cpu.model}</div>
                     ${data.cpu.count_physical} Phys / ${data.cpu.count_logical} Log
                 `;
-                
-                if (data.gpu.available) document.getElementById('gpuName').innerText = data.gpu.name;
                 isFirstLoad = false;
             }
 
@@ -559,39 +2484,63 @@ HTML_TEMPLATE = """
             document.getElementById('ssdVal').innerText = data.storage.root_percent;
             document.getElementById('ssdUsed').innerText = data.storage.root_used_gb;
             document.getElementById('ssdTotal').innerText = data.storage.root_total_gb;
+            updateMounts(data.storage.mounts);
 
             drawGauge('swapGauge', data.memory.swap_percent, NVIDIA_GREEN, true);
             document.getElementById('swapVal').innerText = data.memory.swap_percent.toFixed(1);
             document.getElementById('swapUsed').innerText = data.memory.swap_used_gb;
             document.getElementById('swapTotal').innerText = data.memory.swap_total_gb;
 
-            updateProcessTable(data.processes);
-
-            const gpuCard = document.getElementById('gpuCard');
-            if (data.gpu && data.gpu.available) {
-                gpuCard.style.opacity = "1";
-                drawGauge('gpuUtilGauge', data.gpu.utilization, NVIDIA_GREEN);
-                document.getElementById('gpuUtilVal').innerText = data.gpu.utilization;
-                drawGauge('vramGauge', data.gpu.vram_percent, NVIDIA_GREEN);
-                document.getElementById('vramVal').innerText = data.gpu.vram_used_gb;
-                document.getElementById('vramTotal').innerText = `of ${data.gpu.vram_total_gb} GB`;
-                drawGraph('gpuGraph', data.gpu.history, GRAPH_BLUE);
-                document.getElementById('gpuTemp').innerText = data.gpu.temp_c;
-                const powerPercentage = data.gpu.power_limit_w ? (data.gpu.power_w / data.gpu.power_limit_w) * 100 : 0;
-                const powerColor = powerPercentage > DANGER_THRESHOLD ? COLORS.danger : powerPercentage > WARNING_THRESHOLD ? COLORS.warning : COLORS.text_bright;
-                document.getElementById('gpuPower').innerHTML = data.gpu.power_limit_w ? `<span style="color: ${powerColor}">${data.gpu.power_w} / ${data.gpu.power_limit_w}</span>` : data.gpu.power_w;
-                document.getElementById('gpuFan').innerText = data.gpu.fan_percent;
-                document.getElementById('gpuDriver').innerText = data.gpu.driver;
-                document.getElementById('pcieTx').innerText = data.gpu.pcie_tx_mb;
-                document.getElementById('pcieRx').innerText = data.gpu.pcie_rx_mb;
+            updateProcessTable(data.processes, data.gpus.length > 0);
+            updateNetwork(data.network);
+            updateDiskIo(data.disk_io);
+            updatePressure(data.pressure);
+
+            ensureGpuCards(data.gpus);
+            if (data.gpus.length === 0) updateGpuCard(0, null);
+            data.gpus.forEach((gpu, i) => updateGpuCard(i, gpu));
+        } catch (e) { console.error(e); }
+    }
+
+    async function pollDashboard() {
+        try {
+            const response = await fetch('/api/full_stats');
+            if (!response.ok) return; // 503 until the first snapshot: try again next poll
+            renderDashboard(await response.json());
+        } catch (e) { console.error(e); }
+    }
+
+    // Apply a delta frame (see DELTA ENCODING in main.py) onto the last full state
+    function applyDelta(state, delta) {
+        for (const key in delta) {
+            const d = delta[key];
+            if (d !== null && typeof d === 'object' && !Array.isArray(d)) {
+                if ('=' in d) { state[key] = d['=']; }
+                else if ('+' in d) { state[key] = state[key].slice(d['+'].length).concat(d['+']); }
+                else { applyDelta(state[key], d); }
             } else {
-                gpuCard.style.opacity = "0.5";
-                document.getElementById('gpuName').innerText = "NO NVIDIA GPU";
+                state[key] = d;
             }
-        } catch (e) { console.error(e); }
+        }
+        return state;
+    }
+
+    if (window.EventSource) {
+        // Server push: one long-lived connection, no per-tick request/handshake.
+        // EventSource reconnects on its own (and gets a fresh full frame) if the server restarts.
+        let state = null;
+        const stream = new EventSource('/api/stream?delta=1');
+        stream.addEventListener('full', (e) => { state = JSON.parse(e.data); renderDashboard(state); });
+        stream.addEventListener('delta', (e) => {
+            if (state === null) return;
+            const d = JSON.parse(e.data);
+            state = '=' in d ? d['='] : applyDelta(state, d);
+            renderDashboard(state);
+        });
+    } else {
+        setInterval(pollDashboard, {{ UPDATE_INTERVAL }});
+        pollDashboard();
     }
-    setInterval(updateDashboard, {{ UPDATE_INTERVAL }});
-    updateDashboard();
 </script>
 </body>
 </html>
@@ -607,9 +2556,337 @@ def index():
         COLORS=COLORS
     )
 
+# --- ENCODED SNAPSHOT CACHE ---
+# A snapshot never changes once published, so each representation of it is encoded once
+# per sampler tick and then served as-is (a memcpy) to every client that asks for it.
+
+INSTANCE_ID = format(time.time_ns(), "x") # Seq restarts at 1 on restart: keep ETags unique
+_encode_cache = {} # kind -> (seq, encoded bytes)
+
+def _encode_once(kind, seq, build):
+    cached = _encode_cache.get(kind)
+    if cached is not None and cached[0] == seq:
+        return cached[1]
+    data = build()
+    _encode_cache[kind] = (seq, data)
+    return data
+
+def _json_bytes(obj):
+    return app.json.encode(obj)
+
+def _snapshot_json(seq, snapshot):
+    return _encode_once("json", seq, lambda: _json_bytes(snapshot))
+
+def parse_sections(text):
+    # "gpu,memory" -> ("memory", "gpus") in canonical order; None/"" means everything
+    if not text:
+        return SECTIONS
+    wanted = {SECTION_ALIASES.get(s.strip().lower(), s.strip().lower()) for s in text.split(",") if s.strip()}
+    unknown = wanted - set(SECTIONS)
+    if unknown:
+        raise ValueError(", ".join(sorted(unknown)))
+    return tuple(s for s in SECTIONS if s in wanted)
+
+def _section_view(snapshot, sections):
+    if sections == SECTIONS:
+        return snapshot
+    view = {k: v for k, v in snapshot.items() if k not in SECTIONS or k in sections}
+    errors = {k: v for k, v in snapshot.get("errors", {}).items() if k in sections}
+    if errors:
+        view["errors"] = errors
+    else:
+        view.pop("errors", None)
+    return view
+
+def _not_ready():
+    # latest() timed out before the first snapshot (e.g. a slow first process sweep on a huge host)
+    response = jsonify({"error": "No snapshot published yet, retry shortly"})
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
+
+def _snapshot_response(kind, mimetype, encode):
+    try:
+        sections = parse_sections(request.args.get("sections"))
+    except ValueError as e:
+        return jsonify({"error": f"Unknown section(s): {e}", "sections": list(SECTIONS)}), 400
+    seq, snapshot = sampler.latest(sections)
+    if snapshot is None:
+        return _not_ready()
+    if sections != SECTIONS:
+        kind = f"{kind}:{','.join(sections)}"
+    etag = f"{INSTANCE_ID}-{kind}-{seq}"
+    headers = {
+        "ETag": f'"{etag}"',
+        "Cache-Control": "no-cache", # Always revalidate; a 304 is nearly free
+        "Vary": "Accept",
+        "X-Schema-Version": str(SCHEMA_VERSION),
+    }
+    if request.if_none_match.contains(etag):
+        # Client already holds this tick: no body at all
+        return Response(status=304, headers=headers)
+    if kind == "json":
+        body = _snapshot_json(seq, snapshot)
+    else:
+        body = _encode_once(kind, seq, lambda: encode(_section_view(snapshot, sections)))
+    return Response(body, mimetype=mimetype, headers=headers)
+
 @app.route('/api/full_stats')
 def full_stats():
-    return jsonify(monitor.get_full_stats())
+    # Content negotiation: scrapers can ask for MessagePack with an Accept header
+    best = request.accept_mimetypes.best_match(("application/json",) + MSGPACK_MIMETYPES, default="application/json")
+    if best in MSGPACK_MIMETYPES and msgpack_encode is not None:
+        return _snapshot_response("msgpack", best, msgpack_encode)
+    return _snapshot_response("json", "application/json", _json_bytes)
+
+@app.route('/api/full_stats.msgpack')
+def full_stats_msgpack():
+    if msgpack_encode is None:
+        return jsonify({"error": "MessagePack support requires the 'msgpack' package"}), 501
+    return _snapshot_response("msgpack", "application/msgpack", msgpack_encode)
+
+def _sse_frame(event, seq, build):
+    # Shared by every connected stream: encoded once per tick
+    def encode():
+        header = f"event: {event}\n" if event != "message" else ""
+        return f"{header}id: {seq}\ndata: ".encode() + build() + b"\n\n"
+    return _encode_once(f"sse:{event}", seq, encode)
+
+@app.route('/api/stream')
+def stream():
+    use_delta = request.args.get("delta") == "1"
+
+    def events():
+        seq, snapshot = sampler.latest()
+        while snapshot is None: # No first snapshot yet: keep the stream open and wait again
+            yield b": keep-alive\n\n"
+            seq, snapshot = sampler.latest()
+        yield _sse_frame("full" if use_delta else "message", seq, lambda: _snapshot_json(seq, snapshot))
+        while True:
+            new_seq, new_snapshot = sampler.wait_next(seq, SSE_KEEPALIVE, SECTIONS)
+            if new_seq == seq:
+                yield b": keep-alive\n\n"
+                continue
+            if not use_delta:
+                frame = _sse_frame("message", new_seq, lambda: _snapshot_json(new_seq, new_snapshot))
+            elif new_seq == seq + 1:
+                # The shared delta for this tick is computed against seq - 1, which we hold
+                frame = _sse_frame("delta", new_seq, lambda: _json_bytes(diff_stats(snapshot, new_snapshot)))
+            else:
+                # Fell behind by more than one tick: resync with a full frame
+                frame = _sse_frame("full", new_seq, lambda: _snapshot_json(new_seq, new_snapshot))
+            seq, snapshot = new_seq, new_snapshot
+            yield frame
+
+    return Response(events(), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no", # Disable proxy buffering (nginx)
+    })
+
+# --- PROMETHEUS EXPOSITION ---
+
+def _prom_escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _prom_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_prom_escape(v)}"' for k, v in labels.items()) + "}"
+
+PROMETHEUS_SECTIONS = ("cpu", "memory", "storage", "network", "disk_io", "pressure", "gpus") # Scrapes never keep the process scan alive
+
+def render_prometheus(snapshot):
+    # Text exposition format 0.0.4, built only from an already published snapshot
+    lines = []
+
+    def metric(name, help_text, samples, kind="gauge"):
+        lines.append(f"# HELP neurodash_{name} {help_text}")
+        lines.append(f"# TYPE neurodash_{name} {kind}")
+        for labels, value in samples:
+            if value is not None:
+                lines.append(f"neurodash_{name}{_prom_labels(labels)} {value}")
+
+    cpu = snapshot.get("cpu")
+    if cpu:
+        metric("cpu_usage_percent", "Global CPU utilization.", [({}, cpu["global_usage"])])
+        metric("cpu_core_usage_percent", "Per logical core CPU utilization.", [({"core": i}, v) for i, v in enumerate(cpu["cores"])])
+        metric("cpu_count", "Number of CPU cores.", [({"type": "physical"}, cpu["count_physical"]), ({"type": "logical"}, cpu["count_logical"])])
+
+    memory = snapshot.get("memory")
+    if memory:
+        metric("memory_usage_percent", "RAM utilization.", [({}, memory["ram_percent"])])
+        metric("memory_used_gigabytes", "RAM in use.", [({}, memory["ram_used_gb"])])
+        metric("memory_total_gigabytes", "Installed RAM.", [({}, memory["ram_total_gb"])])
+        metric("swap_usage_percent", "Swap utilization.", [({}, memory["swap_percent"])])
+        metric("swap_used_gigabytes", "Swap in use.", [({}, memory["swap_used_gb"])])
+
+    storage = snapshot.get("storage")
+    if storage:
+        mounts = storage["mounts"]
+        labels = [{"mountpoint": m["mountpoint"], "device": m["device"], "fstype": m["fstype"]} for m in mounts]
+        metric("filesystem_usage_percent", "Filesystem utilization.", [(label, m["percent"]) for label, m in zip(labels, mounts)])
+        metric("filesystem_used_gigabytes", "Filesystem space in use.", [(label, m["used_gb"]) for label, m in zip(labels, mounts)])
+        metric("filesystem_size_gigabytes", "Filesystem size.", [(label, m["total_gb"]) for label, m in zip(labels, mounts)])
+        metric("filesystem_stale", "1 if the last statvfs did not answer within the timeout (e.g. hung NFS).",
+               [(label, int(m["stale"])) for label, m in zip(labels, mounts)])
+
+    network = snapshot.get("network")
+    if network:
+        for key, name, help_text in (
+            ("rx_mb", "network_receive_megabytes_per_second", "Network receive throughput."),
+            ("tx_mb", "network_transmit_megabytes_per_second", "Network transmit throughput."),
+            ("rx_pps", "network_receive_packets_per_second", "Network packets received."),
+            ("tx_pps", "network_transmit_packets_per_second", "Network packets sent."),
+            ("errors_ps", "network_errors_per_second", "Network receive and transmit errors."),
+            ("drops_ps", "network_drops_per_second", "Network receive and transmit drops."),
+        ):
+            metric(name, help_text, [({"device": nic["name"]}, nic[key]) for nic in network])
+
+    disk_io = snapshot.get("disk_io")
+    if disk_io:
+        for key, name, help_text in (
+            ("read_mb", "disk_read_megabytes_per_second", "Disk read throughput."),
+            ("write_mb", "disk_write_megabytes_per_second", "Disk write throughput."),
+            ("read_iops", "disk_reads_per_second", "Completed disk reads."),
+            ("write_iops", "disk_writes_per_second", "Completed disk writes."),
+            ("busy_percent", "disk_busy_percent", "Share of time the disk had I/O in flight."),
+            ("await_ms", "disk_await_milliseconds", "Average time per completed disk request."),
+        ):
+            metric(name, help_text, [({"device": disk["name"]}, disk[key]) for disk in disk_io])
+
+    pressure = snapshot.get("pressure")
+    if pressure:
+        samples = [(resource, kind, values) for resource, entry in pressure.items()
+                   for kind, values in entry.items() if kind in ("some", "full")]
+        metric("pressure_stall_seconds_total", "Cumulative time tasks were stalled on the resource (PSI).",
+               [({"resource": resource, "kind": kind}, values["total_us"] / 1e6) for resource, kind, values in samples], kind="counter")
+        metric("pressure_avg10_percent", "PSI share of stalled time over the last 10s.",
+               [({"resource": resource, "kind": kind}, values["avg10"]) for resource, kind, values in samples])
+
+    gpus = snapshot.get("gpus")
+    if gpus:
+        metric("gpu_up", "1 if the GPU answers NVML queries.", [({"gpu": g["index"], "name": g["name"]}, int(g["available"])) for g in gpus])
+        for key, name, help_text in (
+            ("utilization", "gpu_utilization_percent", "GPU compute utilization."),
+            ("vram_percent", "gpu_memory_usage_percent", "VRAM utilization."),
+            ("vram_used_gb", "gpu_memory_used_gigabytes", "VRAM in use."),
+            ("vram_total_gb", "gpu_memory_total_gigabytes", "Total VRAM."),
+            ("temp_c", "gpu_temperature_celsius", "GPU core temperature."),
+            ("fan_percent", "gpu_fan_percent", "GPU fan speed."),
+            ("power_w", "gpu_power_watts", "GPU power draw."),
+            ("power_limit_w", "gpu_power_limit_watts", "GPU enforced power limit."),
+            ("pcie_tx_mb", "gpu_pcie_tx_megabytes_per_second", "PCIe transmit throughput."),
+            ("pcie_rx_mb", "gpu_pcie_rx_megabytes_per_second", "PCIe receive throughput."),
+            ("sm_clock_mhz", "gpu_sm_clock_megahertz", "Current SM clock."),
+            ("mem_clock_mhz", "gpu_memory_clock_megahertz", "Current memory clock."),
+            ("pstate", "gpu_performance_state", "Performance state (0 = P0, maximum performance)."),
+        ):
+            metric(name, help_text, [({"gpu": g["index"]}, g.get(key)) for g in gpus if g["available"]])
+        metric("gpu_clock_event_reason", "1 while the clock event (throttle) reason is active.",
+               [({"gpu": g["index"], "reason": reason}, int(reason in g["throttle_reasons"]))
+                for g in gpus if g["available"] for _, reason in THROTTLE_REASONS])
+        metric("gpu_throttled_seconds_total", "Time spent with a throughput-limiting throttle reason active.",
+               [({"gpu": g["index"]}, g["throttled_seconds"]) for g in gpus if g["available"]], kind="counter")
+    lines.append("")
+    return "\n".join(lines).encode()
+
+@app.route('/metrics')
+def prometheus_metrics():
+    # Scrapes read the shared snapshot: no psutil/NVML call happens here
+    seq, snapshot = sampler.latest(PROMETHEUS_SECTIONS, ttl=METRICS_SCRAPE_INTERVAL + DEMAND_TTL)
+    if snapshot is None:
+        return _not_ready()
+    body = _encode_once("prometheus", seq, lambda: render_prometheus(snapshot))
+    return Response(body, content_type="text/plain; version=0.0.4; charset=utf-8")
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def _parse_duration(text):
+    # "90", "90s", "10m", "24h", "30d" -> seconds
+    text = text.strip().lower()
+    if text and text[-1] in DURATION_UNITS:
+        value = int(text[:-1]) * DURATION_UNITS[text[-1]]
+    else:
+        value = int(text)
+    if value <= 0:
+        raise ValueError(text)
+    return value
+
+def _paging(default_limit):
+    limit = min(int(request.args.get("limit", default_limit)), PROCESS_LIMIT_MAX)
+    offset = int(request.args.get("offset", 0))
+    if limit < 1 or offset < 0:
+        raise ValueError
+    return limit, offset
+
+@app.route('/api/processes')
+def processes():
+    sort = request.args.get("sort", "mem")
+    if sort not in PROCESS_SORTS:
+        return jsonify({"error": f"Unknown sort: {sort}", "sorts": list(PROCESS_SORTS)}), 400
+    try:
+        limit, offset = _paging(50)
+    except ValueError:
+        return jsonify({"error": f"limit must be 1-{PROCESS_LIMIT_MAX} and offset >= 0"}), 400
+    sampler.latest(("processes",)) # Keeps the process collector active, waits for its first sweep
+    table = monitor.process_table
+    total, rows = table.query(PROCESS_SORTS[sort], limit, offset, request.args.get("user"), request.args.get("name"))
+    return jsonify({
+        "sort": sort,
+        "total": total,
+        "offset": offset,
+        "updated": table.refreshed_at,
+        "processes": rows
+    })
+
+@app.route('/api/process_groups')
+def process_groups():
+    grouping = request.args.get("by", "tree")
+    sort = request.args.get("sort", "mem")
+    if grouping not in PROCESS_GROUPINGS or sort not in PROCESS_SORTS:
+        return jsonify({"error": f"Unknown grouping or sort: {grouping}, {sort}",
+                        "by": list(PROCESS_GROUPINGS), "sorts": list(PROCESS_SORTS)}), 400
+    try:
+        limit, offset = _paging(20)
+    except ValueError:
+        return jsonify({"error": f"limit must be 1-{PROCESS_LIMIT_MAX} and offset >= 0"}), 400
+    sampler.latest(("processes",))
+    table = monitor.process_table
+    total, rows = table.query_groups(grouping, PROCESS_SORTS[sort], limit, offset)
+    return jsonify({
+        "by": grouping,
+        "sort": sort,
+        "total": total,
+        "offset": offset,
+        "updated": table.refreshed_at,
+        "groups": rows
+    })
+
+@app.route('/api/inventory')
+def inventory():
+    monitor.revalidate_inventory()
+    return jsonify(monitor.inventory)
+
+@app.route('/api/collectors')
+def collectors():
+    return jsonify({"tick_s": sampler.wheel.tick_s, "collectors": sampler.describe()})
+
+@app.route('/api/history')
+def history():
+    store = monitor.history
+    metric = request.args.get("metric")
+    if metric is None:
+        return jsonify({
+            "metrics": sorted(store.metrics),
+            "archives": [{"step_s": step, "rows": rows} for step, rows in store.archives]
+        })
+    if metric not in store.metrics:
+        return jsonify({"error": f"Unknown metric '{metric}'"}), 404
+    try:
+        range_s = _parse_duration(request.args.get("range", "10m"))
+    except ValueError:
+        return jsonify({"error": "Invalid range, expected e.g. 90s, 10m, 24h or 30d"}), 400
+    return jsonify(store.query(metric, range_s))
 
 if __name__ == "__main__":
     # In PROD, this block is ignored by Gunicorn.
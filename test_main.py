@@ -0,0 +1,512 @@
+"""Behavioural checks for NeuroDash (stdlib unittest, no GPU needed).
+
+Usage:
+    uv run python -m unittest -v test_main
+
+NVML paths run against the fake NVML from bench.py.
+"""
+import contextlib
+import copy
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+import types
+import unittest
+from unittest import mock
+
+os.environ.setdefault("HISTORY_FILE", "") # Never touch the real history file from a test
+
+import main  # noqa: E402
+from bench import make_fake_nvml  # noqa: E402
+
+
+class HistoryStoreTest(unittest.TestCase):
+    # Ring math of the multi-resolution history: 10 x 1s rows, 4 x 5s rows
+    T = 1000 # Multiple of every step, so slot boundaries are easy to read
+
+    def setUp(self):
+        self.store = main.HistoryStore(archives=((1, 10), (5, 4)))
+        self.store.register("x")
+
+    def fill(self, values, start=0):
+        for k, value in enumerate(values):
+            self.store.update("x", value, self.T + start + k)
+
+    def test_tail_pads_oldest_first(self):
+        self.fill([10, 20, 30])
+        self.assertEqual(self.store.tail("x", 5), [0, 0, 10, 20, 30])
+
+    def test_ring_wraps(self):
+        self.fill(range(1, 16))
+        self.assertEqual(self.store.tail("x", 12), [0, 0] + list(range(6, 16)))
+
+    def test_samples_in_one_slot_are_consolidated(self):
+        for offset, value in ((0.2, 10), (0.5, 50), (0.7, 30)):
+            self.store.update("x", value, self.T + offset)
+        self.assertEqual(self.store.tail("x", 1), [30])
+        # 20s range: the 5s archive, slot T..T+4 is the last of its 4 rows
+        result = self.store.query("x", 20, now=self.T + 4)
+        self.assertEqual((result["step_s"], result["start"]), (5, self.T - 15))
+        self.assertEqual(result["min"], [None, None, None, 10])
+        self.assertEqual(result["avg"], [None, None, None, 30])
+        self.assertEqual(result["max"], [None, None, None, 50])
+
+    def test_downtime_rows_are_cleared(self):
+        # A full ring, then nothing for T+10..T+12: those rows held T..T+2 and must read empty
+        self.fill(range(10))
+        self.store.update("x", 99, self.T + 13)
+        result = self.store.query("x", 10, now=self.T + 13)
+        self.assertEqual(result["avg"], [4, 5, 6, 7, 8, 9, None, None, None, 99])
+        self.assertEqual(self.store.tail("x", 7), [4, 5, 6, 7, 8, 9, 99])
+
+    def test_clock_stepping_back_is_dropped(self):
+        self.fill([10, 20, 30])
+        self.store.update("x", 1000, self.T)
+        self.assertEqual(self.store.tail("x", 3), [10, 20, 30])
+
+    def test_range_past_the_last_write_is_empty(self):
+        self.fill([10])
+        result = self.store.query("x", 10, now=self.T + 5)
+        self.assertEqual(result["avg"], [None] * 4 + [10] + [None] * 5)
+
+
+class HistoryFileTest(unittest.TestCase):
+    # Memory-mapped history file: persistence across restarts and metric-set migration
+    ARCHIVES = ((1, 10), (5, 4))
+    T = 1000
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "history.bin")
+
+    def store(self, *names, archives=ARCHIVES):
+        store = main.HistoryStore(archives=archives)
+        for name in names:
+            store.register(name)
+        self.assertTrue(store.attach(self.path))
+        self.addCleanup(self.close, store)
+        return store
+
+    def close(self, store):
+        # Stands in for process exit: unmapping drops the flock held through the mapping's fd
+        if store._mm is None or store._mm.closed:
+            return
+        store.data.release()
+        store.last_slot.release()
+        store._mm.close()
+        store._file.close()
+
+    def test_restart_keeps_history(self):
+        first = self.store("x", "y")
+        for k in range(3):
+            first.update("x", 10 * (k + 1), self.T + k)
+            first.update("y", 1, self.T + k)
+        self.close(first)
+        second = self.store("x", "y")
+        self.assertEqual(second.tail("x", 3), [10, 20, 30])
+        second.update("x", 40, self.T + 3) # Ring state (last slot) survived too
+        self.assertEqual(second.tail("x", 4), [10, 20, 30, 40])
+
+    def test_metric_set_change_migrates(self):
+        # A GPU removed (y) and another added (z): x keeps its rows, z starts empty
+        first = self.store("x", "y")
+        first.update("x", 10, self.T)
+        first.update("y", 20, self.T)
+        self.close(first)
+        second = self.store("z", "x")
+        self.assertEqual(second.tail("x", 1), [10])
+        self.assertEqual(second.tail("z", 1), [0])
+        self.close(second)
+        third = self.store("z", "x") # Same set again: mapped as-is
+        self.assertEqual(third.tail("x", 1), [10])
+
+    def test_archive_change_starts_over(self):
+        first = self.store("x")
+        first.update("x", 10, self.T)
+        self.close(first)
+        second = self.store("x", archives=((1, 20),))
+        self.assertEqual(second.tail("x", 1), [0])
+
+    @unittest.skipIf(main.fcntl is None, "no flock on this platform")
+    def test_second_writer_is_refused(self):
+        self.store("x")
+        other = main.HistoryStore(archives=self.ARCHIVES)
+        other.register("x")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertFalse(other.attach(self.path))
+        other.update("x", 10, self.T) # Still usable in RAM
+        self.assertEqual(other.tail("x", 1), [10])
+
+
+class DeltaEncodingTest(unittest.TestCase):
+    # Server-side diff_stats and the dashboard's applyDelta must agree
+    PREV = {
+        "cpu": {"global_usage": 10.0, "history": list(range(8)), "cores": [5, 6]},
+        "gpus": [{"index": 0, "available": True, "utilization": 90, "history": [7, 8, 9]},
+                 {"index": 1, "available": True, "utilization": 20, "history": [1, 1, 1]}],
+        "disks": None,
+    }
+
+    def cur(self):
+        return copy.deepcopy(self.PREV)
+
+    def test_unchanged_is_empty(self):
+        self.assertEqual(main.diff_stats(self.PREV, self.cur()), {})
+
+    def test_history_shift_sends_new_points(self):
+        cur = self.cur()
+        cur["cpu"]["history"] = list(range(2, 10))
+        cur["cpu"]["global_usage"] = 12.5
+        self.assertEqual(main.diff_stats(self.PREV, cur), {"cpu": {"history": {"+": [8, 9]}, "global_usage": 12.5}})
+
+    def test_history_rewrite_sends_the_ring(self):
+        cur = self.cur()
+        cur["cpu"]["history"] = [9] * 8 # No shift of MAX_HISTORY_SHIFT or less explains it
+        self.assertEqual(main.diff_stats(self.PREV, cur), {"cpu": {"history": {"=": [9] * 8}}})
+
+    def test_lists(self):
+        cur = self.cur()
+        cur["gpus"][1]["utilization"] = 50
+        cur["cpu"]["cores"] = [5, 7]
+        self.assertEqual(main.diff_stats(self.PREV, cur), {"gpus": {"1": {"utilization": 50}}, "cpu": {"cores": [5, 7]}})
+        cur["gpus"].pop()
+        self.assertEqual(main.diff_stats(self.PREV, cur)["gpus"], cur["gpus"]) # Shape changed: whole list
+
+    def test_removed_keys_replace_the_subtree(self):
+        cur = self.cur()
+        cur["gpus"][0] = {"index": 0, "available": False}
+        cur["disks"] = {"sda": {"read_mb": 1}}
+        self.assertEqual(main.diff_stats(self.PREV, cur), {
+            "gpus": {"0": {"=": {"index": 0, "available": False}}},
+            "disks": {"=": {"sda": {"read_mb": 1}}},
+        })
+
+    @unittest.skipUnless(shutil.which("node"), "node is not installed")
+    def test_client_merge_round_trip(self):
+        # Runs the applyDelta shipped in HTML_TEMPLATE on every delta and expects the new snapshot
+        source = re.search(r"^( *)function applyDelta\(.*?^\1\}$", main.HTML_TEMPLATE, re.S | re.M).group(0)
+        snapshots = [self.cur() for _ in range(7)]
+        snapshots[0]["cpu"]["history"] = list(range(3, 11))
+        snapshots[1]["cpu"]["history"] = [0] * 8
+        snapshots[2]["gpus"][0].update(utilization=0, history=[8, 9, 0])
+        snapshots[3]["gpus"].pop()
+        snapshots[4]["gpus"][0] = {"index": 0, "available": False}
+        snapshots[5]["disks"] = {"sda": {"read_mb": 1}}
+        del snapshots[6]["disks"]
+        cases = [[self.PREV, main.diff_stats(self.PREV, cur)] for cur in snapshots]
+        script = source + """
+            const cases = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+            console.log(JSON.stringify(cases.map(([state, d]) => '=' in d ? d['='] : applyDelta(state, d))));
+        """
+        result = subprocess.run(["node", "-e", script], input=json.dumps(cases), capture_output=True, text=True, check=True)
+        self.assertEqual(json.loads(result.stdout), snapshots)
+
+
+class CgroupLabelTest(unittest.TestCase):
+    # /proc/<pid>/cgroup -> container, unit or slice label
+    CASES = (
+        ("0::/system.slice/docker-0123456789abcdef0123.scope\n", "docker:0123456789ab"),
+        ("0::/machine.slice/libpod-abcdef0123456789.scope\n", "podman:abcdef012345"),
+        ("0::/kubepods.slice/kubepods-besteffort.slice/kubepods-besteffort-pod1.slice/"
+         "cri-containerd-fedcba9876543210aa.scope\n", "containerd:fedcba987654"),
+        ("12:memory:/docker/0123456789abcdef\n1:name=systemd:/docker/0123456789abcdef\n", "docker:0123456789ab"), # v1
+        ("1:name=systemd:/user.slice/user-1000.slice/session-4.scope\n0::/\n", "session-4.scope"), # Hybrid
+        ("0::/system.slice/ssh.service\n", "ssh.service"),
+        ("0::/user.slice\n", "user.slice"),
+        ("0::/\n", "/"),
+    )
+
+    def test_labels(self):
+        for data, label in self.CASES:
+            with self.subTest(data=data), mock.patch("builtins.open", mock.mock_open(read_data=data)) as opened:
+                self.assertEqual(main.read_cgroup(42), label)
+                opened.assert_called_once_with("/proc/42/cgroup")
+
+    def test_gone_process(self):
+        with mock.patch("builtins.open", side_effect=FileNotFoundError):
+            self.assertIsNone(main.read_cgroup(42))
+
+
+class ProcessTreeTest(unittest.TestCase):
+    # Job roots: the topmost ancestor below a boundary process, PID 1 or a change of user
+    def setUp(self):
+        self.table = main.ProcessTable()
+        for pid, name, username, ppid in (
+            (1, "systemd", "root", 0),
+            (100, "sshd", "root", 1),
+            (200, "bash", "alice", 100),
+            (300, "python", "alice", 200), # train.py
+            (301, "python", "alice", 300), # DataLoader workers
+            (302, "python", "alice", 300),
+            (400, "sudo", "root", 200),
+            (401, "nvidia-smi", "root", 400),
+            (500, "python", "bob", 300),
+            (600, "orphan", "alice", 9999), # Parent not tracked (exited or hidden)
+            (700, "daemon", "alice", 1),
+        ):
+            self.table._keys[pid] = (pid, 0.0)
+            self.table.entries[pid, 0.0] = {"pid": pid, "name": name, "username": username, "ppid": ppid}
+
+    def root(self, pid, roots=None):
+        return self.table._tree_root(self.table.entries[pid, 0.0], {} if roots is None else roots)["pid"]
+
+    def test_roots(self):
+        for pid, root in ((300, 300), (301, 300), (302, 300), (401, 401), (500, 500), (600, 600), (700, 700)):
+            with self.subTest(pid=pid):
+                self.assertEqual(self.root(pid), root)
+
+    def test_walk_is_memoised(self):
+        roots = {}
+        self.root(301, roots)
+        self.assertEqual({pid: entry["pid"] for pid, entry in roots.items()}, {300: 300, 301: 300})
+        self.table.entries[300, 0.0]["ppid"] = 700 # A fresh walk would now climb to 700; the memo stops at 300
+        self.assertEqual(self.root(302, roots), 300)
+
+    def test_tree_aggregate(self):
+        measured = [(self.table.entries[pid, 0.0], {"memory_percent": 1.0, "cpu_percent": 50.0})
+                    for pid in (300, 301, 302, 500)]
+        for entry, _ in measured:
+            entry["cgroup"] = "session-4.scope"
+        groups = self.table._aggregate(measured)
+        self.assertEqual(groups["tree"], [
+            {"pid": 300, "name": "python", "username": "alice", "count": 3, "memory_percent": 3.0, "cpu_percent": 150.0},
+            {"pid": 500, "name": "python", "username": "bob", "count": 1, "memory_percent": 1.0, "cpu_percent": 50.0},
+        ])
+        self.assertEqual([(g["cgroup"], g["count"]) for g in groups["cgroup"]], [("session-4.scope", 4)])
+
+
+class FakeProcFile:
+    # Stands in for a ProcFile: read() returns the next queued content
+    def __init__(self, *contents):
+        self.contents = list(contents)
+
+    def read(self):
+        return memoryview(self.contents.pop(0))
+
+
+class ProcfsTest(unittest.TestCase):
+    # /proc/stat and /proc/meminfo fast path
+    STAT = (b"cpu  100 5 50 800 20 3 2 10 7 0\n"
+            b"cpu0 60 0 30 400 10 0 0 0 7 0\n"
+            b"cpu1 40 5 20 400 10 3 2 10 0 0\n"
+            b"intr 12345 0 0\n")
+    MEMINFO = (b"MemTotal:       16384000 kB\n"
+               b"MemFree:         1000000 kB\n"
+               b"MemAvailable:    4096000 kB\n"
+               b"Buffers:          200000 kB\n"
+               b"Cached:          3000000 kB\n"
+               b"SwapCached:            0 kB\n"
+               b"SwapTotal:       2048000 kB\n"
+               b"SwapFree:        1024000 kB\n")
+
+    def test_parse_proc_stat(self):
+        # total = user..steal (guest is counted in user), busy = total - idle - iowait
+        self.assertEqual(main.parse_proc_stat(memoryview(self.STAT)), [(990, 170), (500, 90), (490, 80)])
+
+    def test_cpu_percents(self):
+        previous = [(1000, 100), (1000, 100), (1000, 100), (1000, 100)]
+        current = [(1200, 150), (1100, 300), (1100, 90), (1000, 100)]
+        # 25%, clamped at 100 (jiffies skew), clamped at 0, no time elapsed
+        self.assertEqual(main.cpu_percents(previous, current), [25.0, 100.0, 0.0, 0.0])
+
+    def test_parse_meminfo(self):
+        self.assertEqual(main.parse_meminfo(memoryview(self.MEMINFO)), {
+            b"MemTotal": 16384000 * 1024, b"MemFree": 1000000 * 1024, b"MemAvailable": 4096000 * 1024,
+            b"Buffers": 200000 * 1024, b"Cached": 3000000 * 1024,
+            b"SwapTotal": 2048000 * 1024, b"SwapFree": 1024000 * 1024,
+        })
+
+    def test_memory_usage(self):
+        collector = main.MemoryCollector(main.monitor)
+        old_kernel = b"".join(line + b"\n" for line in self.MEMINFO.splitlines() if not line.startswith(b"MemAvailable"))
+        collector.meminfo = FakeProcFile(self.MEMINFO, old_kernel)
+        kb = 1024
+        self.assertEqual(collector.usage(), (16384000 * kb, 12288000 * kb, 2048000 * kb, 1024000 * kb))
+        # Before Linux 3.14: available = free + buffers + cached
+        self.assertEqual(collector.usage()[1], (16384000 - 4200000) * kb)
+
+    def test_cpu_hotplug_restarts_the_baseline(self):
+        collector = main.CpuCollector(main.monitor)
+        two_cores = b"cpu  10 0 10 80 0 0 0 0\ncpu0 5 0 5 40 0 0 0 0\ncpu1 5 0 5 40 0 0 0 0\n"
+        one_core = b"cpu  20 0 20 160 0 0 0 0\ncpu0 20 0 20 160 0 0 0 0\n"
+        collector.stat = FakeProcFile(one_core, b"cpu  30 0 20 170 0 0 0 0\ncpu0 30 0 20 170 0 0 0 0\n")
+        collector.last_times = main.parse_proc_stat(two_cores)
+        self.assertEqual(collector.percents(), (0.0, [0.0]))
+        self.assertEqual(collector.percents(), (50.0, [50.0]))
+
+    @unittest.skipUnless(hasattr(os, "preadv"), "no preadv on this platform")
+    def test_proc_file_grows_its_buffer(self):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(self.MEMINFO)
+            f.flush()
+            proc_file = main.ProcFile(f.name, size=16)
+            self.addCleanup(os.close, proc_file.fd)
+            self.assertEqual(bytes(proc_file.read()), self.MEMINFO)
+            self.assertEqual(bytes(proc_file.read()), self.MEMINFO) # Re-read from offset 0
+
+
+class PressureTest(unittest.TestCase):
+    # /proc/pressure/* parsing and the per-tick stall share from the cumulative totals
+    def pressure(self, some_total, full_total=None):
+        data = b"some avg10=1.50 avg60=0.75 avg300=0.10 total=%d\n" % some_total
+        if full_total is not None:
+            data += b"full avg10=0.50 avg60=0.25 avg300=0.00 total=%d\n" % full_total
+        return data
+
+    def test_parse_pressure(self):
+        self.assertEqual(main.parse_pressure(memoryview(self.pressure(123))), {"some": (1.5, 0.75, 123)})
+        self.assertEqual(main.parse_pressure(self.pressure(123, 45)), {"some": (1.5, 0.75, 123), "full": (0.5, 0.25, 45)})
+
+    def test_stall_percent(self):
+        history = main.HistoryStore()
+        collector = main.PressureCollector(types.SimpleNamespace(history=history))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        io_path = os.path.join(directory.name, "io") # Plain path, as when the /proc fast path is off
+        collector.files = {"cpu": FakeProcFile(self.pressure(1000000), self.pressure(1500000)), "io": io_path}
+        for resource in collector.files:
+            history.register(f"psi_{resource}_some")
+        ticks = []
+        for tick, content in ((100.0, self.pressure(500000, 400000)), (102.0, self.pressure(3500000, 400000))):
+            with open(io_path, "wb") as f:
+                f.write(content)
+            with mock.patch.object(main.time, "monotonic", return_value=tick):
+                ticks.append(collector.collect(tick))
+        self.assertEqual(ticks[0]["cpu"]["some"]["stall_percent"], 0.0) # No previous total yet
+        self.assertEqual(ticks[1]["cpu"]["some"], {"avg10": 1.5, "avg60": 0.75, "stall_percent": 25.0, "total_us": 1500000})
+        self.assertNotIn("full", ticks[1]["cpu"])
+        self.assertEqual(ticks[1]["io"]["some"]["stall_percent"], 100.0) # 3s stalled in 2s: clamped
+        self.assertEqual(ticks[1]["io"]["full"]["stall_percent"], 0.0)
+        self.assertEqual(ticks[1]["cpu"]["history"][-2:], [0, 25.0])
+
+
+class FakeNvmlTest(unittest.TestCase):
+    # Swaps main.pynvml for a fake for the duration of each test
+    def setUp(self):
+        self.saved = main.pynvml if main.HAS_NVIDIA_LIB else None, main.HAS_NVIDIA_LIB
+
+    def tearDown(self):
+        main.pynvml, main.HAS_NVIDIA_LIB = self.saved
+
+    def gpu_collector(self, nvml):
+        # GPU collector of a fresh monitor on top of `nvml`
+        main.pynvml, main.HAS_NVIDIA_LIB = nvml, True
+        return main.AdvancedSystemMonitor().collectors["gpus"]
+
+
+class GpuDevicesTest(FakeNvmlTest):
+    # One entry and one history metric per NVML device
+    def test_every_device_is_listed(self):
+        collector = self.gpu_collector(make_fake_nvml(0, 0, gpus=3))
+        gpus = collector.collect(time.time())
+        self.assertEqual([gpu["index"] for gpu in gpus], [0, 1, 2])
+        self.assertTrue(all(gpu["available"] for gpu in gpus))
+        self.assertEqual([gpu["metric"] for gpu in collector.monitor.gpus], ["gpu0_util", "gpu1_util", "gpu2_util"])
+        self.assertEqual(len(collector.monitor.inventory["gpus"]), 3)
+
+    def test_failing_device_does_not_hide_the_others(self):
+        nvml = make_fake_nvml(0, 0, gpus=2)
+        utilization = nvml.nvmlDeviceGetUtilizationRates
+
+        def flaky(handle):
+            if handle == 1:
+                raise RuntimeError("NVML_ERROR_GPU_IS_LOST")
+            return utilization(handle)
+
+        nvml.nvmlDeviceGetUtilizationRates = flaky
+        gpus = self.gpu_collector(nvml).collect(time.time())
+        self.assertEqual([gpu["available"] for gpu in gpus], [True, False])
+        self.assertEqual(gpus[0]["utilization"], 97)
+
+
+class GpuFieldBatchTest(FakeNvmlTest):
+    # Batched field values, per-call fallback and the PCIe lane
+    def test_field_batch(self):
+        # Power from the batch, PCIe rates from the cumulative byte counters
+        collector = self.gpu_collector(make_fake_nvml(0, 0))
+        first = collector.collect(time.time())[0]
+        self.assertEqual(first["power_w"], 652)
+        self.assertEqual((first["pcie_tx_mb"], first["pcie_rx_mb"]), (0, 0)) # No delta yet
+        time.sleep(0.01)
+        second = collector.collect(time.time())[0]
+        self.assertGreater(second["pcie_tx_mb"], 0)
+        self.assertEqual(second["pcie_tx_mb"], second["pcie_rx_mb"])
+        gpu = collector.monitor.gpus[0]
+        self.assertIn("pcie_counters", gpu)
+        self.assertIsNot(gpu.get("fields"), False)
+
+    def test_field_batch_fallback(self):
+        # A failing batch call disables the batch for the device; power falls back to its own call
+        nvml = make_fake_nvml(0, 0)
+
+        def broken(handle, field_ids):
+            raise RuntimeError("NVML_ERROR_NOT_SUPPORTED")
+
+        nvml.nvmlDeviceGetFieldValues = broken
+        nvml.nvmlDeviceGetPowerUsage = lambda handle: 300000
+        collector = self.gpu_collector(nvml)
+        stats = collector.collect(time.time())[0]
+        self.assertTrue(stats["available"])
+        self.assertEqual(stats["power_w"], 300)
+        self.assertIs(collector.monitor.gpus[0]["fields"], False)
+
+    def test_pcie_lane(self):
+        # Without byte counters the lane thread fills the PCIe rates (8 GB/s from the fake)
+        collector = self.gpu_collector(make_fake_nvml(0, 0, pcie_counters=False))
+        collector.collect(time.time()) # Starts the lane
+        deadline = time.monotonic() + 2
+        while 0 not in collector.pcie_lane.rates and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stats = collector.collect(time.time())[0]
+        self.assertEqual((stats["pcie_tx_mb"], stats["pcie_rx_mb"]), (8192, 8192))
+
+
+class GpuThrottleTest(FakeNvmlTest):
+    # Clocks, P-state and throttle episodes
+    def test_clocks_unsupported(self):
+        # Boards without clock queries keep reporting every other metric
+        nvml = make_fake_nvml(0, 0)
+        del nvml.nvmlDeviceGetClockInfo, nvml.nvmlDeviceGetCurrentClocksEventReasons
+        stats = self.gpu_collector(nvml).collect(time.time())[0]
+        self.assertTrue(stats["available"])
+        self.assertIsNone(stats["sm_clock_mhz"])
+        self.assertEqual(stats["pstate"], 0)
+        self.assertEqual(stats["throttle_reasons"], [])
+        self.assertFalse(stats["throttled"])
+
+    def test_throttle_episodes(self):
+        # One tick per second: idle, power cap, power cap + thermal, clear, HW thermal twice
+        nvml = make_fake_nvml(0, 0)
+        collector = self.gpu_collector(nvml)
+        t0 = float(int(time.time()))
+        flags = []
+        for k, mask in enumerate((0x1, 0x4, 0x4 | 0x20, 0x0, 0x40, 0x40)):
+            nvml.clock_reasons = mask
+            stats = collector.collect(t0 + k)[0]
+            flags.append(stats["throttled"])
+        self.assertEqual(flags, [False, True, True, False, True, True])
+        self.assertEqual(stats["throttle_episodes"], [
+            {"start": t0 + 1, "end": t0 + 3, "reasons": ["sw_power_cap", "sw_thermal"]},
+            {"start": t0 + 4, "end": None, "reasons": ["hw_thermal"]},
+        ])
+        self.assertEqual(stats["throttled_seconds"], 2.0) # 1->2 and 4->5, closing interval excluded
+        self.assertEqual(stats["throttle_history"][-6:], [0, 100, 100, 0, 100, 100])
+        self.assertEqual((stats["sm_clock_mhz"], stats["sm_clock_max_mhz"], stats["pstate"]), (1980, 1980, 0))
+
+    def test_idle_is_not_throttling(self):
+        nvml = make_fake_nvml(0, 0)
+        nvml.clock_reasons = 0x1 | 0x2 | 0x10 # Idle, application clocks, sync boost
+        stats = self.gpu_collector(nvml).collect(time.time())[0]
+        self.assertEqual(stats["throttle_reasons"], ["gpu_idle", "applications_clocks", "sync_boost"])
+        self.assertFalse(stats["throttled"])
+        self.assertEqual(stats["throttle_episodes"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()